@@ -0,0 +1,201 @@
+# In-process backlight control for the XF86MonBrightness keys.
+#
+# The keys used to spawn scripts/qtile_brightness on every press, which in turn
+# ran xbacklight or light and dunstify. Backlight writes the sysfs brightness
+# file itself. A held key only moves the target; the target is written at most
+# once per `interval`, so any number of repeats collapses into a steady stream
+# of small steps, and a single notification goes out once the key is released.
+# The target is kept in the device's raw units, and every press moves it by at
+# least one, so devices with only a handful of levels step too.
+#
+# Writing the brightness file needs the udev rule shipped with brightnessctl or
+# light (which gives the 'video' group write access). Everything here takes the
+# sysfs root as an argument, so it can be pointed at a fake tree, e.g.
+#
+#   fake/acpi_video0/brightness      -> "30"
+#   fake/acpi_video0/max_brightness  -> "100"
+#
+#   Backlight(root="fake").change(+5)
+
+import asyncio
+import os
+
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+from qtile_extras import widget
+
+import notify
+import uevent
+
+BACKLIGHT_DIR = "/sys/class/backlight"
+
+
+class Backlight:
+    def __init__(self, device=None, root=BACKLIGHT_DIR, step=5, interval=0.05):
+        self.root = root
+        self.step = step
+        self.interval = interval
+        self._device = device
+        self._max = None
+        self._target = None
+        self._written = None
+        self._timer = None
+        self._subscribers = []
+
+    @property
+    def device(self):
+        if self._device is None:
+            devices = sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []
+            if not devices:
+                return None
+            self._device = devices[0]
+        return self._device
+
+    def _path(self, name):
+        return os.path.join(self.root, self.device, name)
+
+    @property
+    def max_brightness(self):
+        if self._max is None:
+            with open(self._path("max_brightness")) as f:
+                self._max = int(f.read())
+        return self._max
+
+    def raw(self):
+        """Current brightness in the device's own units."""
+        with open(self._path("brightness")) as f:
+            return int(f.read())
+
+    def percent(self):
+        """Current brightness in percent, or None without a backlight device."""
+        if self.device is None:
+            return None
+        return self._percent(self.raw())
+
+    def _percent(self, value):
+        return round(value * 100 / self.max_brightness)
+
+    def change(self, delta):
+        """Move the target by `delta` percent, but by at least one raw step:
+        with a coarse max_brightness (say 7) a 5% step would round to no
+        change at all."""
+        if self.device is None or not delta:
+            return
+        # The target is kept in raw units for the whole burst; reading the
+        # file back and rounding to percent could land on the same value.
+        if self._target is not None:
+            current = self._target
+        elif self._timer is not None:
+            current = self._written
+        else:
+            current = self.raw()
+        step = round(self.max_brightness * delta / 100) or (1 if delta > 0 else -1)
+        self._target = max(0, min(self.max_brightness, current + step))
+        if self._timer is None:
+            self._flush()
+
+    def _flush(self):
+        target, self._target = self._target, None
+        if target is None:
+            # No presses during the last interval: the burst is over.
+            self._timer = None
+            self._notify()
+            return
+        self._write(target)
+        self._timer = asyncio.get_running_loop().call_later(self.interval, self._flush)
+
+    def _write(self, value):
+        self._written = value
+        try:
+            with open(self._path("brightness"), "w") as f:
+                f.write(str(value))
+        except PermissionError:
+            logger.warning("Cannot set brightness: no write permission for %s", self._path("brightness"))
+            return
+        self._changed(self._percent(value))
+
+    def subscribe(self, callback):
+        if not self._subscribers:
+            uevent.monitor.subscribe("backlight", self._on_uevent)
+        self._subscribers.append(callback)
+        callback(self.percent())
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+        if not self._subscribers:
+            uevent.monitor.unsubscribe("backlight", self._on_uevent)
+
+    def _on_uevent(self, event):
+        # Firmware hotkeys change the backlight behind our back and the kernel
+        # reports that with a "change" uevent on the device.
+        if os.path.basename(event.get("DEVPATH", "")) == self.device:
+            self._changed(self.percent())
+
+    def _changed(self, percent):
+        for callback in list(self._subscribers):
+            callback(percent)
+
+    def _notify(self):
+        percent = self.percent()
+        if percent is not None:
+            notify.notify(
+                "Brightness", "Brightness : {}%".format(percent),
+                tag="brightness", timeout=2000,
+            )
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._subscribers.clear()
+        uevent.monitor.unsubscribe("backlight", self._on_uevent)
+
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+if "controller" in globals():
+    controller.close()  # noqa: F821
+controller = Backlight()
+
+
+@lazy.function
+def brightness_up(qtile):
+    controller.change(controller.step)
+
+
+@lazy.function
+def brightness_down(qtile):
+    controller.change(-controller.step)
+
+
+class Brightness(widget.TextBox):
+    """Optional bar widget showing the backlight level, updated on change.
+
+    Shows nothing on machines without a backlight, so it is safe to leave in
+    the widget list of a desktop.
+    """
+
+    defaults = [
+        ("format", "{percent}%", "Display format"),
+    ]
+
+    def __init__(self, **config):
+        widget.TextBox.__init__(self, "", **config)
+        self.add_defaults(Brightness.defaults)
+        self.add_callbacks(
+            {
+                "Button4": lambda: controller.change(controller.step),
+                "Button5": lambda: controller.change(-controller.step),
+            }
+        )
+
+    def timer_setup(self):
+        controller.subscribe(self._on_change)
+
+    def _on_change(self, percent):
+        text = "" if percent is None else self.format.format(percent=percent)
+        self.qtile.call_soon(self.update, text)
+
+    def finalize(self):
+        controller.unsubscribe(self._on_change)
+        widget.TextBox.finalize(self)
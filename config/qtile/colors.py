@@ -1,133 +1,226 @@
 # If using transparency, make sure you add (background="#00000000") to 'Screen' line(s).
-# Then, you can use RGBA color codes to add transparency to the colors below.
-# For ex: colors = [["#282c34ee", "#282c34dd"], ...
-
-DoomOne = [
-    ["#282c34", "#282c34"], # bg
-    ["#bbc2cf", "#bbc2cf"], # fg
-    ["#1c1f24", "#1c1f24"], # color01
-    ["#ff6c6b", "#ff6c6b"], # color02
-    ["#98be65", "#98be65"], # color03
-    ["#da8548", "#da8548"], # color04
-    ["#51afef", "#51afef"], # color05
-    ["#c678dd", "#c678dd"], # color06
-    ["#46d9ff", "#46d9ff"]  # color15
-    ]
-
-Dracula  = [
-    ["#282a36", "#282a36"], # bg
-    ["#f8f8f2", "#f8f8f2"], # fg
-    ["#000000", "#000000"], # color01
-    ["#ff5555", "#ff5555"], # color02
-    ["#50fa7b", "#50fa7b"], # color03
-    ["#f1fa8c", "#f1fa8c"], # color04
-    ["#bd93f9", "#bd93f9"], # color05
-    ["#ff79c6", "#ff79c6"], # color06
-    ["#9aedfe", "#9aedfe"]  # color15
-    ]
-
-GruvboxDark  = [
-    ["#282828", "#282828"], # bg
-    ["#ebdbb2", "#ebdbb2"], # fg
-    ["#000000", "#000000"], # color01
-    ["#fb4934", "#fb4934"], # color02
-    ["#98971a", "#98971a"], # color03
-    ["#d79921", "#d79921"], # color04
-    ["#83a598", "#83a598"], # color05
-    ["#d3869b", "#d3869b"], # color06
-    ["#b8bb26", "#b8bb26"], # color11
-    ]
-MonokaiPro = [
-    ["#2D2A2E", "#2D2A2E"], # bg
-    ["#FCFCFA", "#FCFCFA"], # fg
-    ["#403E41", "#403E41"], # color01
-    ["#FF6188", "#FF6188"], # color02
-    ["#A9DC76", "#A9DC76"], # color03
-    ["#FFD866", "#FFD866"], # color04
-    ["#FC9867", "#FC9867"], # color05
-    ["#AB9DF2", "#AB9DF2"], # color06
-    ["#78DCE8", "#78DCE8"]  # color07
-    ]
-Girhub = [
-    ["#0d1117", "#0d1117"], # bg
-    ["#b3b1ad", "#b3b1ad"], # fg
-    ["#484f58", "#484f58"], # color01
-    ["#ff7b72", "#ff7b72"], # color02
-    ["#3fb950", "#3fb950"], # color03
-    ["#d29922", "#d29922"], # color04
-    ["#d18616", "#d18616"], # color05
-    ["#bc8cff", "#bc8cff"], # color06
-    ["#39c5cf", "#39c5cf"]  # color07
-    ]
-
-Nord = [
-    ["#2E3440", "#2E3440"], # bg
-    ["#D8DEE9", "#D8DEE9"], # fg
-    ["#3B4252", "#3B4252"], # color01
-    ["#BF616A", "#BF616A"], # color02
-    ["#A3BE8C", "#A3BE8C"], # color03
-    ["#EBCB8B", "#EBCB8B"], # color04
-    ["#81A1C1", "#81A1C1"], # color05
-    ["#B48EAD", "#B48EAD"], # color06
-    ["#88C0D0", "#88C0D0"]  # color07
-    ]
-
-OceanicNext = [
-    ["#1b2b34", "#1b2b34"], # bg
-    ["#d8dee9", "#d8dee9"], # fg
-    ["#29414f", "#29414f"], # color01
-    ["#ec5f67", "#ec5f67"], # color02
-    ["#99c794", "#99c794"], # color03
-    ["#fac863", "#fac863"], # color04
-    ["#6699cc", "#6699cc"], # color05
-    ["#c594c5", "#c594c5"], # color06
-    ["#5fb3b3", "#5fb3b3"]  # color07
-    ]
-
-Palenight = [
-    ["#292d3e", "#292d3e"], # bg
-    ["#d0d0d0", "#d0d0d0"], # fg
-    ["#434758", "#434758"], # color01
-    ["#f07178", "#f07178"], # color02
-    ["#c3e88d", "#c3e88d"], # color03
-    ["#ffcb6b", "#ffcb6b"], # color04
-    ["#82aaff", "#82aaff"], # color05
-    ["#c792ea", "#c792ea"], # color06
-    ["#89ddff", "#89ddff"]  # color15
-    ]
-
-SolarizedDark = [
-    ["#002b36", "#002b36"], # bg
-    ["#839496", "#839496"], # fg
-    ["#073642", "#073642"], # color01
-    ["#dc322f", "#dc322f"], # color02
-    ["#859900", "#859900"], # color03
-    ["#b58900", "#b58900"], # color04
-    ["#268bd2", "#268bd2"], # color05
-    ["#d33682", "#d33682"], # color06
-    ["#2aa198", "#2aa198"]  # color15
-    ]
-
-SolarizedLight = [
-    ["#fdf6e3", "#fdf6e3"], # bg
-    ["#657b83", "#657b83"], # fg
-    ["#ece5ac", "#ece5ac"], # color01
-    ["#dc322f", "#dc322f"], # color02
-    ["#859900", "#859900"], # color03
-    ["#b58900", "#b58900"], # color04
-    ["#268bd2", "#268bd2"], # color05
-    ["#d33682", "#d33682"], # color06
-    ["#2aa198", "#2aa198"]  # color15
-    ]
-
-TomorrowNight = [
-    ["#1d1f21", "#1d1f21"], # bg
-    ["#c5c8c6", "#c5c8c6"], # fg
-    ["#373b41", "#373b41"], # color01
-    ["#cc6666", "#cc6666"], # color02
-    ["#b5bd68", "#b5bd68"], # color03
-    ["#e6c547", "#e6c547"], # color04
-    ["#81a2be", "#81a2be"], # color05
-    ["#b294bb", "#b294bb"], # color06
-    ["#70c0ba", "#70c0ba"]  # color15
-    ]
+# Then, you can use RGBA color codes to add transparency to the colors below,
+# e.g. "#282c34ee", or derive a translucent scheme with `colors.alpha(0.85)`.
+#
+# Every scheme is an immutable Palette of nine colours. Indexing works as it
+# always did (colors[0] is the background, colors[8] the accent used for
+# borders), the slots also have names (colors.bg, colors.fg, colors.color01 ...)
+# and each entry is a plain "#rrggbb" string that qtile draws as a solid colour.
+# The schemes used to be lists of ["#hex", "#hex"] pairs, which qtile treats as
+# a two-stop gradient and rebuilds on every draw of every widget.
+
+import functools
+from operator import itemgetter
+
+SLOTS = ("bg", "fg", "color01", "color02", "color03", "color04", "color05", "color06", "color15")
+
+
+class Colour(str):
+    """One palette entry. Being a str it can go anywhere qtile takes a colour;
+    the parsed forms are computed once, on first use."""
+
+    @functools.cached_property
+    def rgba8(self):
+        """(r, g, b, a) as integers 0-255."""
+        value = self.lstrip("#")
+        if len(value) == 3:
+            value = "".join(c * 2 for c in value)
+        alpha = int(value[6:8], 16) if len(value) == 8 else 255
+        return (int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16), alpha)
+
+    @functools.cached_property
+    def rgba(self):
+        """(r, g, b, a) as cairo floats 0.0-1.0, what set_source_rgba() takes
+        (see mpris.py)."""
+        return tuple(c / 255.0 for c in self.rgba8)
+
+    def alpha(self, alpha):
+        """This colour with opacity `alpha` (0.0-1.0) as "#rrggbbaa"."""
+        variants = self.__dict__.setdefault("_alpha", {})
+        if alpha not in variants:
+            r, g, b, _ = self.rgba8
+            variants[alpha] = Colour("#{:02x}{:02x}{:02x}{:02x}".format(r, g, b, round(alpha * 255)))
+        return variants[alpha]
+
+
+class Palette(tuple):
+    def __new__(cls, name, *colours):
+        if len(colours) != len(SLOTS):
+            raise ValueError("{}: expected {} colours, got {}".format(name, len(SLOTS), len(colours)))
+        self = tuple.__new__(cls, (Colour(c) for c in colours))
+        self.__dict__["name"] = name
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Palette is immutable")
+
+    def __getnewargs__(self):
+        # For copy and pickle: tuple's own would leave out the name.
+        return (self.name, *self)
+
+    # Used by layout_theme and the floating layout.
+    border_focus = property(itemgetter(8))
+    border_normal = property(itemgetter(0))
+
+    def alpha(self, alpha):
+        """The same scheme with every colour at opacity `alpha`."""
+        variants = self.__dict__.setdefault("_alpha", {})
+        if alpha not in variants:
+            variants[alpha] = Palette(self.name, *(c.alpha(alpha) for c in self))
+        return variants[alpha]
+
+    def pairs(self):
+        """The old [["#hex", "#hex"], ...] form, for anything still expecting it."""
+        return [[c, c] for c in self]
+
+    def __repr__(self):
+        return "<Palette {}>".format(self.name)
+
+
+for _index, _slot in enumerate(SLOTS):
+    setattr(Palette, _slot, property(itemgetter(_index)))
+del _index, _slot
+
+
+DoomOne = Palette(
+    "DoomOne",
+    "#282c34", # bg
+    "#bbc2cf", # fg
+    "#1c1f24", # color01
+    "#ff6c6b", # color02
+    "#98be65", # color03
+    "#da8548", # color04
+    "#51afef", # color05
+    "#c678dd", # color06
+    "#46d9ff"  # color15
+    )
+
+Dracula = Palette(
+    "Dracula",
+    "#282a36", # bg
+    "#f8f8f2", # fg
+    "#000000", # color01
+    "#ff5555", # color02
+    "#50fa7b", # color03
+    "#f1fa8c", # color04
+    "#bd93f9", # color05
+    "#ff79c6", # color06
+    "#9aedfe"  # color15
+    )
+
+GruvboxDark = Palette(
+    "GruvboxDark",
+    "#282828", # bg
+    "#ebdbb2", # fg
+    "#000000", # color01
+    "#fb4934", # color02
+    "#98971a", # color03
+    "#d79921", # color04
+    "#83a598", # color05
+    "#d3869b", # color06
+    "#b8bb26"  # color11
+    )
+
+MonokaiPro = Palette(
+    "MonokaiPro",
+    "#2D2A2E", # bg
+    "#FCFCFA", # fg
+    "#403E41", # color01
+    "#FF6188", # color02
+    "#A9DC76", # color03
+    "#FFD866", # color04
+    "#FC9867", # color05
+    "#AB9DF2", # color06
+    "#78DCE8"  # color07
+    )
+
+Girhub = Palette(
+    "Girhub",
+    "#0d1117", # bg
+    "#b3b1ad", # fg
+    "#484f58", # color01
+    "#ff7b72", # color02
+    "#3fb950", # color03
+    "#d29922", # color04
+    "#d18616", # color05
+    "#bc8cff", # color06
+    "#39c5cf"  # color07
+    )
+
+Nord = Palette(
+    "Nord",
+    "#2E3440", # bg
+    "#D8DEE9", # fg
+    "#3B4252", # color01
+    "#BF616A", # color02
+    "#A3BE8C", # color03
+    "#EBCB8B", # color04
+    "#81A1C1", # color05
+    "#B48EAD", # color06
+    "#88C0D0"  # color07
+    )
+
+OceanicNext = Palette(
+    "OceanicNext",
+    "#1b2b34", # bg
+    "#d8dee9", # fg
+    "#29414f", # color01
+    "#ec5f67", # color02
+    "#99c794", # color03
+    "#fac863", # color04
+    "#6699cc", # color05
+    "#c594c5", # color06
+    "#5fb3b3"  # color07
+    )
+
+Palenight = Palette(
+    "Palenight",
+    "#292d3e", # bg
+    "#d0d0d0", # fg
+    "#434758", # color01
+    "#f07178", # color02
+    "#c3e88d", # color03
+    "#ffcb6b", # color04
+    "#82aaff", # color05
+    "#c792ea", # color06
+    "#89ddff"  # color15
+    )
+
+SolarizedDark = Palette(
+    "SolarizedDark",
+    "#002b36", # bg
+    "#839496", # fg
+    "#073642", # color01
+    "#dc322f", # color02
+    "#859900", # color03
+    "#b58900", # color04
+    "#268bd2", # color05
+    "#d33682", # color06
+    "#2aa198"  # color15
+    )
+
+SolarizedLight = Palette(
+    "SolarizedLight",
+    "#fdf6e3", # bg
+    "#657b83", # fg
+    "#ece5ac", # color01
+    "#dc322f", # color02
+    "#859900", # color03
+    "#b58900", # color04
+    "#268bd2", # color05
+    "#d33682", # color06
+    "#2aa198"  # color15
+    )
+
+TomorrowNight = Palette(
+    "TomorrowNight",
+    "#1d1f21", # bg
+    "#c5c8c6", # fg
+    "#373b41", # color01
+    "#cc6666", # color02
+    "#b5bd68", # color03
+    "#e6c547", # color04
+    "#81a2be", # color05
+    "#b294bb", # color06
+    "#70c0ba"  # color15
+    )
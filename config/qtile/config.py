@@ -29,22 +29,60 @@ import subprocess
 from libqtile import bar, extension, hook, layout, qtile, widget
 from libqtile.config import Click, Drag, Group, Key, KeyChord, Match, Screen, ScratchPad, DropDown
 from libqtile.lazy import lazy
-# Make sure 'qtile-extras' is installed or this config will not work.
-from qtile_extras import widget
-from qtile_extras.widget.decorations import BorderDecoration
-#from qtile_extras.widget import StatusNotifier
-import colors
+# Set QTILE_PROFILE to a file path to get a timing report of each phase below.
+import profiler
+with profiler.phase("import qtile_extras"):
+    # Make sure 'qtile-extras' is installed or this config will not work.
+    from qtile_extras import widget
+    from qtile_extras.widget.decorations import BorderDecoration
+    #from qtile_extras.widget import StatusNotifier
+with profiler.phase("colors"):
+    import colors
+import sampler
+import polltext
+# Volume control needs 'pulsectl-asyncio' (see volume.py).
+import volume
+import backlight
+import redraw
+import lazylayouts
+import supervisor
+import theme
+# Key bindings spawn through the fork server in scripts/qtile_launcher.
+import launcher
+# The mod1+F1 run menu is fed from an in-memory index of $PATH.
+import runindex
+import floatrules
+import outputs
+# Window titles are repainted at most twice a second per window.
+import windowname
+# Clicking the Memory or DF widget opens a process/disk popup (not htop).
+import procmon
+# Notifications go over one persistent D-Bus connection.
+import notify
+# Keys, hooks and widget clicks are timed; see latency.py.
+import latency
+# MOD + CTRL + r reloads only what changed in this file.
+import hotreload
+# Duplicate key bindings are merged or reported; see keymap.py.
+import keymap
+# The track title scrolls from a strip rendered once per track (and not while paused).
+import mpris
 
 # Allows you to input a name when adding treetab section.
 @lazy.layout.function
+@latency.timed("add_treetab_section")
 def add_treetab_section(layout):
     prompt = qtile.widgets_map["prompt"]
     prompt.start_input("Section name: ", layout.cmd_add_section)
 
+# Session daemons (picom, dunst, ksuperkey, ...) are declared in supervisor.py,
+# which starts them concurrently; scripts/qtile_autostart and autostart.sh are
+# no longer run from here.
 @hook.subscribe.startup_once
+@profiler.timed("startup_once autostart")
+@latency.timed("hook startup_once autostart")
 def autostart():
-    home = os.path.expanduser('~')
-    subprocess.Popen([home + '/.config/qtile/scripts/qtile_autostart'])
+    supervisor.start(qtile)
 
 home         = os.path.expanduser('~')
 mod          = "mod4"              # Sets mod key to SUPER/WINDOWS
@@ -53,10 +91,7 @@ myBrowser    = "brave" # My browser of choice
 terminal     = home + '/.config/qtile/scripts/qtile_term'
 music_player = home + '/.config/qtile/scripts/qtile_music'
 color_picker = home + '/.config/qtile/scripts/qtile_colorpicker'
-brightness   = home + '/.config/qtile/scripts/qtile_brightness'
-volume       = home + '/.config/qtile/scripts/qtile_volume'
 screenshot   = home + '/.config/qtile/scripts/qtile_screenshot'
-notify_cmd   = 'dunstify -u low -h string:x-dunst-stack-tag:qtileconfig'
 
 # A list of available commands that can be bound to keys can be found
 # at https://docs.qtile.org/en/latest/manual/config/lazy.html
@@ -64,79 +99,79 @@ keys = [
 
     Key(
 		["mod1"], "F1", 
-		lazy.spawn("dm-run"), 
+		runindex.run_menu(), 
 		desc="Run application launcher"
 	),
     # The essential    
     Key(
 		[mod], "Return", 
-		lazy.spawn(terminal), 
+		launcher.spawn(terminal), 
 		desc="Launch terminal with qtile configs"
 	),
     Key(
 		[mod, "shift"], "Return", 
-		lazy.spawn(terminal + ' --float'), 
+		launcher.spawn(terminal + ' --float'), 
 		desc="Launch floating terminal with qtile configs"
 	),
     Key(
 		[mod, "mod1"], "Return", 
-		lazy.spawn(terminal + ' --full'), 
+		launcher.spawn(terminal + ' --full'), 
 		desc="Launch fullscreen terminal with qtile configs"
 	),
 
-    Key([mod, "shift"], "q", lazy.spawn("dm-logout"), desc="Logout menu"),
+    Key([mod, "shift"], "q", launcher.spawn("dm-logout"), desc="Logout menu"),
 
 
     Key(
 		[], "XF86MonBrightnessUp", 
-		lazy.spawn(brightness + ' --inc'),
+		backlight.brightness_up,
 		desc="Increase display brightness"	
 	),
     Key(
 		[], "XF86MonBrightnessDown", 
-		lazy.spawn(brightness + ' --dec'),
+		backlight.brightness_down,
 		desc="Decrease display brightness"	
 	),
 
     Key(
 		[], "XF86AudioRaiseVolume", 
-		lazy.spawn(volume + ' --inc'),
+		volume.volume_up,
 		desc="Raise speaker volume"	
 	),
     Key(
 		[], "XF86AudioLowerVolume", 
-		lazy.spawn(volume + ' --dec'),
+		volume.volume_down,
 		desc="Lower speaker volume"	
 	),
     Key(
 		[], "XF86AudioMute", 
-		lazy.spawn(volume + ' --toggle'),
+		volume.toggle_mute,
 		desc="Toggle mute"	
 	),
     Key(
 		[], "XF86AudioMicMute", 
-		lazy.spawn(volume + ' --toggle-mic'),
+		volume.toggle_mic,
 		desc="Toggle mute for mic"
 	),
 
     Key(
 		[], "XF86AudioNext", 
-		lazy.spawn("playerctl next"),
+		launcher.spawn("playerctl next"),
 		desc="Next track"
 	),
     Key(
 		[], "XF86AudioPrev", 
-		lazy.spawn("playerctl previous"),
+		launcher.spawn("playerctl previous"),
 		desc="Previous track"
 	),
     Key(
 		[], "XF86AudioPlay", 
-		lazy.spawn("playerctl play-pause"),
+		launcher.spawn("playerctl play-pause"),
 		desc="Toggle play/pause"
 	),
     Key(
 		[], "XF86AudioStop", 
-		lazy.spawn("playerctl stop"),
+		launcher.spawn("playerctl stop"),
 		desc="Stop playing"
 	),
 
@@ -151,22 +186,27 @@ keys = [
 		desc="Kill focused window"
 	),
 
+    # Applies only what changed in this file; see hotreload.py. The full
+    # reload is needed after editing the other modules.
     Key(
 		[mod, "control"], "r", 
+		hotreload.reload(),
+		desc="Reload the config (changes only)"
+	),
+    Key(
+		[mod, "control", "shift"], "r", 
 		lazy.reload_config(),
-		lazy.spawn(notify_cmd + ' "Configuration Reloaded!"'),
-		desc="Reload the config"
+		notify.send("Configuration Reloaded!", tag="qtileconfig", urgency=notify.LOW),
+		desc="Reload the config and all its modules"
 	),
     Key(
 		[mod, "control"], "s", 
-		lazy.restart(), 
-		lazy.spawn(notify_cmd + ' "Restarting Qtile..."'),
+		notify.before("restart", "Restarting Qtile...", tag="qtileconfig", urgency=notify.LOW),
 		desc="Restart Qtile"
 	),
     Key(
 		[mod, "control"], "q", 
-		lazy.shutdown(), 
-		lazy.spawn(notify_cmd + ' "Exiting Qtile..."'),
+		notify.before("shutdown", "Exiting Qtile...", tag="qtileconfig", urgency=notify.LOW),
 		desc="Shutdown Qtile"
 	),
 
@@ -193,13 +233,6 @@ keys = [
 	),
     Key([mod], "space", lazy.layout.next(), desc="Move window focus to other window"),
 
-
-    # Toggle between split and unsplit sides of stack.
-    # Split = all windows displayed
-    # Unsplit = 1 window displayed, like Max layout, but still with
-    # multiple stack panes
-    Key([mod, "shift"], "space", lazy.layout.toggle_split(), desc="Toggle between split and unsplit sides of stack"),
-
     # Treetab prompt
     Key([mod, "shift"], "a", add_treetab_section, desc='Prompt to add new section in treetab'),
 
@@ -302,21 +335,26 @@ keys = [
 		desc="Toggle between layouts"
 	),
 
-	# Increase the space for master window at the expense of slave windows
+	# Increase the space for master window at the expense of slave windows.
+	# The same keys grow windows in other layouts (see above); keymap.py
+	# merges the two bindings.
     Key(
 		[mod], "equal", 
-		lazy.layout.increase_ratio(), 
+		lazy.layout.increase_ratio().when(layout=["ratiotile", "spiral", "tile"]), 
 		desc="Increase the space for master window"
 	),
 
 	# Decrease the space for master window in the advantage of slave windows
     Key(
 		[mod], "minus", 
-		lazy.layout.decrease_ratio(), 
+		lazy.layout.decrease_ratio().when(layout=["ratiotile", "spiral", "tile"]), 
 		desc="Decrease the space for master window"
 	),
 
     # Toggle between split and unsplit sides of stack.
+    # Split = all windows displayed
+    # Unsplit = 1 window displayed, like Max layout, but still with
+    # multiple stack panes
     Key(
         [mod, "shift"], "s",
         lazy.layout.toggle_split(),
@@ -364,21 +402,21 @@ keys = [
 
     # Dmenu scripts launched using the key chord SUPER+p followed by 'key'
     KeyChord([mod], "p", [
-        Key([], "h", lazy.spawn("dm-hub"), desc='List all dmscripts'),
-        Key([], "a", lazy.spawn("dm-sounds"), desc='Choose ambient sound'),
-        Key([], "b", lazy.spawn("dm-setbg"), desc='Set background'),
-        Key([], "c", lazy.spawn("dtos-colorscheme"), desc='Choose color scheme'),
-        Key([], "e", lazy.spawn("dm-confedit"), desc='Choose a config file to edit'),
-        Key([], "i", lazy.spawn("dm-maim"), desc='Take a screenshot'),
-        Key([], "k", lazy.spawn("dm-kill"), desc='Kill processes '),
-        Key([], "m", lazy.spawn("dm-man"), desc='View manpages'),
-        Key([], "n", lazy.spawn("dm-note"), desc='Store and copy notes'),
-        Key([], "o", lazy.spawn("dm-bookman"), desc='Browser bookmarks'),
-        Key([], "p", lazy.spawn("passmenu -p \"Pass: \""), desc='Logout menu'),
-        Key([], "q", lazy.spawn("dm-logout"), desc='Logout menu'),
-        Key([], "r", lazy.spawn("dm-radio"), desc='Listen to online radio'),
-        Key([], "s", lazy.spawn("dm-websearch"), desc='Search various engines'),
-        Key([], "t", lazy.spawn("dm-translate"), desc='Translate text')
+        Key([], "h", launcher.spawn("dm-hub"), desc='List all dmscripts'),
+        Key([], "a", launcher.spawn("dm-sounds"), desc='Choose ambient sound'),
+        Key([], "b", launcher.spawn("dm-setbg"), desc='Set background'),
+        Key([], "c", launcher.spawn("dtos-colorscheme"), desc='Choose color scheme'),
+        Key([], "e", launcher.spawn("dm-confedit"), desc='Choose a config file to edit'),
+        Key([], "i", launcher.spawn("dm-maim"), desc='Take a screenshot'),
+        Key([], "k", launcher.spawn("dm-kill"), desc='Kill processes '),
+        Key([], "m", launcher.spawn("dm-man"), desc='View manpages'),
+        Key([], "n", launcher.spawn("dm-note"), desc='Store and copy notes'),
+        Key([], "o", launcher.spawn("dm-bookman"), desc='Browser bookmarks'),
+        Key([], "p", launcher.spawn("passmenu -p \"Pass: \""), desc='Logout menu'),
+        Key([], "q", launcher.spawn("dm-logout"), desc='Logout menu'),
+        Key([], "r", launcher.spawn("dm-radio"), desc='Listen to online radio'),
+        Key([], "s", launcher.spawn("dm-websearch"), desc='Search various engines'),
+        Key([], "t", launcher.spawn("dm-translate"), desc='Translate text')
     ])
 
 ]
@@ -420,6 +458,10 @@ for i in groups:
         ]
     )
 
+# Duplicate bindings are merged or reported; see keymap.py.
+keys = keymap.compile(keys)
+latency.keys(keys)
+
 
 ### COLORSCHEME ###
 # Colors are defined in a separate 'colors.py' file.
@@ -437,17 +479,28 @@ for i in groups:
 # colors = colors.TomorrowNight
 #
 # It is best not manually change the colorscheme; instead run 'dtos-colorscheme'
-# which is set to 'MOD + p c'
+# which is set to 'MOD + p c'. It switches the scheme of the running qtile (see
+# theme.py) and remembers the choice, so the scheme named here is only used
+# until one has been picked.
+
+colors = theme.load("Girhub")
 
-colors = colors.Girhub
+@hook.subscribe.startup
+def _install_latency():
+    latency.install(qtile)
+
+@hook.subscribe.startup
+@latency.timed("hook startup run index")
+def _start_run_index():
+    runindex.index.start()
 
 ### LAYOUTS ###
 # Some settings that I use on almost every layout, which saves us
 # from having to type these out for each individual layout.
 layout_theme = {"border_width": 2,
                 "margin": 8,
-                "border_focus": colors[8],
-                "border_normal": colors[0]
+                "border_focus": colors.border_focus,
+                "border_normal": colors.border_normal
                 }
 
 
@@ -470,9 +523,12 @@ var_gap_right = 5
 var_font_name = 'JetBrainsMono Nerd Font'
 
 
-layouts = [
+# Layouts are built per group the first time the group switches to them, not
+# 15 x 9 times at startup; see lazylayouts.py.
+with profiler.phase("layouts", objects=True):
+    layouts = [
 	# Extension of the Stack layout
-    layout.Columns(
+    lazylayouts.Columns(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_on_single=False,
@@ -490,7 +546,7 @@ layouts = [
 	),
 
 	# Layout inspired by bspwm
-    layout.Bsp(
+    lazylayouts.Bsp(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_on_single=False,
@@ -505,7 +561,7 @@ layouts = [
     ),
 
 	# This layout divides the screen into a matrix of equally sized cells and places one window in each cell.
-    layout.Matrix(
+    lazylayouts.Matrix(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_width=var_border_width,    
@@ -514,7 +570,7 @@ layouts = [
     ),
 
 	# Maximized layout
-    layout.Max(
+    lazylayouts.Max(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_width=var_border_width,    
@@ -522,7 +578,7 @@ layouts = [
     ),
 
 	# Emulate the behavior of XMonad's default tiling scheme.
-    layout.MonadTall(
+    lazylayouts.MonadTall(
 		align=0,
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
@@ -540,7 +596,7 @@ layouts = [
     ),
 
 	# Emulate the behavior of XMonad's ThreeColumns layout.
-    layout.MonadThreeCol(
+    lazylayouts.MonadThreeCol(
 		align=0,
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
@@ -559,7 +615,7 @@ layouts = [
     ),
 
 	# Emulate the behavior of XMonad's horizontal tiling scheme.
-    layout.MonadWide(
+    lazylayouts.MonadWide(
 		align=0,
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
@@ -577,7 +633,7 @@ layouts = [
     ),
 
 	# Tries to tile all windows in the width/height ratio passed in
-    layout.RatioTile(
+    lazylayouts.RatioTile(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_width=var_border_width,
@@ -588,14 +644,14 @@ layouts = [
     ),
 
 	# This layout cuts piece of screen_rect and places a single window on that piece, and delegates other window placement to other layout
-    layout.Slice(
+    lazylayouts.Slice(
 		match=None,
 		side='left',
 		width=256
     ),
 
 	# A mathematical layout, Renders windows in a spiral form by splitting the screen based on a selected ratio.
-    layout.Spiral(
+    lazylayouts.Spiral(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_width=var_border_width,
@@ -609,7 +665,7 @@ layouts = [
     ),
     
 	# A layout composed of stacks of windows
-    layout.Stack(
+    lazylayouts.Stack(
 		autosplit=False,
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
@@ -620,7 +676,7 @@ layouts = [
     ),
 
 	# A layout with two stacks of windows dividing the screen
-    layout.Tile(
+    lazylayouts.Tile(
 		add_after_last=False,
 		add_on_top=True,
 		border_focus=var_active_color,
@@ -641,7 +697,7 @@ layouts = [
 
 
 	# Tiling layout that works nice on vertically mounted monitors
-    layout.VerticalTile(
+    lazylayouts.VerticalTile(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_width=var_border_width,
@@ -649,7 +705,7 @@ layouts = [
     ),
 
 	# A layout with single active windows, and few other previews at the right
-    layout.Zoomy(
+    lazylayouts.Zoomy(
 		columnwidth=300,
 		margin=var_margin,
 		property_big='1.0',
@@ -658,7 +714,7 @@ layouts = [
     ),
 
 	# Floating layout, which does nothing with windows but handles focus order
-    layout.Floating(
+    lazylayouts.Floating(
 		border_focus=var_active_color,
 		border_normal=var_normal_color,
 		border_width=var_border_width,
@@ -679,9 +735,13 @@ widget_defaults = dict(
 )
 
 extension_defaults = widget_defaults.copy()
+theme.track(layout_theme, widget_defaults, extension_defaults)
 
 
 def init_widgets_list():
+    # The scheme picked last, also when a monitor is connected after a switch
+    # or after hotreload.reload() (see theme.py).
+    colors = theme.theme.palette
     widgets_list = [
 
         widget.GroupBox(
@@ -726,12 +786,14 @@ def init_widgets_list():
                  padding = 2,
                  fontsize = 14
                  ),
-        widget.WindowName(
+        windowname.WindowName(
                  foreground = colors[6],
-                 max_chars = 40
+                 max_chars = 40,
+                 min_interval = 0.5,
                  ),
 
-        widget.Mpris2(
+        mpris.Mpris2(
+                 name = "mpris2",
                  format = "{xesam:title} - ({xesam:artist})",
                  playing_text = " #  {track}",
                  paused_text  = " # {track}",
@@ -747,9 +809,9 @@ def init_widgets_list():
 
 
 
-        widget.GenPollText(
+        polltext.PollText(
                  update_interval = 300,
-                 func = lambda: subprocess.check_output("printf $(uname -r)", shell=True, text=True),
+                 func = polltext.kernel_release,
                  foreground = colors[3],
                  fmt = ' ❤ {}',
                  decorations=[
@@ -760,7 +822,9 @@ def init_widgets_list():
                  ],
                  ),
         widget.Spacer(length = 8),
-        widget.CPU(
+        # CPU, Memory, DF and Battery share one reading per tick across all
+        # bars; see sampler.py.
+        sampler.CPU(
                  format = ' ▓ Cpu: {load_percent}%',
                  foreground = colors[4],
                  decorations=[
@@ -771,9 +835,9 @@ def init_widgets_list():
                  ],
                  ),
         widget.Spacer(length = 8),
-        widget.Memory(
+        sampler.Memory(
                  foreground = colors[8],
-                 mouse_callbacks = {'Button1': lambda: qtile.cmd_spawn(alacritty + ' -e htop')},
+                 mouse_callbacks = {'Button1': procmon.toggle()},
                  format = '{MemUsed: .0f}{mm}',
                  fmt = ' 🖥 Mem: {} used',
                  decorations=[
@@ -784,10 +848,10 @@ def init_widgets_list():
                  ],
                  ),
         widget.Spacer(length = 8),
-        widget.DF(
+        sampler.DF(
                  update_interval = 60,
                  foreground = colors[5],
-                 mouse_callbacks = {'Button1': lambda: qtile.cmd_spawn(alacritty + ' -e df')},
+                 mouse_callbacks = {'Button1': procmon.toggle()},
                  partition = '/',
                  #format = '[{p}] {uf}{m} ({r:.0f}%)',
                  format = '{uf}{m} free',
@@ -802,7 +866,7 @@ def init_widgets_list():
                  ),
         widget.Spacer(length = 8),
 
-        widget.Battery(
+        sampler.Battery(
                   update_interval = 10,
                   fontsize = 12,
                   foreground = colors[8],
@@ -814,7 +878,12 @@ def init_widgets_list():
 
         widget.Spacer(length = 8),
 
-        widget.Volume(
+        # Laptops: shows the backlight level, updated on change (see backlight.py).
+        # Enabling it moves the systray, so adjust the index in widgets_for_screen().
+        # backlight.Brightness(foreground = colors[3], fmt = ' ☀ {}'),
+        # widget.Spacer(length = 8),
+
+        volume.Volume(
                  foreground = colors[7],
                  fmt = ' 🕫 Vol: {}',
                  decorations=[
@@ -838,36 +907,59 @@ def init_widgets_list():
                  ],
                  ),
         widget.Spacer(length = 8),
-        widget.Systray(padding = 3),
-        widget.Spacer(length = 8),
 
         ]
     return widgets_list
 
-# Monitor 1 will display ALL widgets in widgets_list. It is important that this
-# is the only monitor that displays all widgets because the systray widget will
-# crash if you try to run multiple instances of it.
+# The systray can only exist once, so it is not in the list above; outputs.py
+# puts it at the end of the bar on the primary monitor.
+def init_tray():
+    return [
+        widget.Systray(padding = 3),
+        widget.Spacer(length = 8),
+    ]
+
+# Building the widget list is the most expensive part of loading this file, so
+# each screen's widgets are built the first time they are asked for and then
+# cached. The module-level widgets_* names below reuse those lists instead of
+# constructing copies of their own that no bar would ever display.
+_screen_widgets = {}
+
+def widgets_for_screen(index):
+    if index not in _screen_widgets:
+        with profiler.phase("widgets screen {}".format(index), objects=True):
+            widgets = init_widgets_list()
+        # Bars without a monitor yet still follow colorscheme switches.
+        theme.track(*widgets)
+        latency.mouse_callbacks(widgets)
+        _screen_widgets[index] = widgets
+    return _screen_widgets[index]
+
+# Monitor 1 shows the widget list plus the systray (see init_tray()), the
+# other monitors only the widget list. A widget can only live in one bar, so
+# every monitor gets its own list.
 def init_widgets_screen1():
-    widgets_screen1 = init_widgets_list()
-    return widgets_screen1 
+    return widgets_for_screen(0)
 
-# All other monitors' bars will display everything but widgets 22 (systray) and 23 (spacer).
-def init_widgets_screen2():
-    widgets_screen2 = init_widgets_list()
-    del widgets_screen2[22:24]
-    return widgets_screen2
+def init_widgets_screen2(index=1):
+    return widgets_for_screen(index)
 
+# Bars repaint in frames (max_fps, default 30) instead of once per widget request; see redraw.py.
 # For adding transparency to your bar, add (background="#00000000") to the "Screen" line(s)
 # For ex: Screen(top=bar.Bar(widgets=init_widgets_screen2(), background="#00000000", size=24)),
 
+def init_screen(index):
+    return Screen(top=redraw.Bar(widgets=widgets_for_screen(index), size=26))
+
+# Monitors that are plugged in or out (docking) only cost their own bar; the
+# bars of the others are kept as they are. See outputs.py.
 def init_screens():
-    return [Screen(top=bar.Bar(widgets=init_widgets_screen1(), size=26)),
-            Screen(top=bar.Bar(widgets=init_widgets_screen2(), size=26)),
-            Screen(top=bar.Bar(widgets=init_widgets_screen2(), size=26))]
+    return outputs.init(init_screen, init_tray, count=3)
 
 if __name__ in ["config", "__main__"]:
-    screens = init_screens()
-    widgets_list = init_widgets_list()
+    with profiler.phase("screens", objects=True):
+        screens = init_screens()
+    widgets_list = init_widgets_screen1()
     widgets_screen1 = init_widgets_screen1()
     widgets_screen2 = init_widgets_screen2()
 
@@ -883,8 +975,9 @@ dgroups_app_rules = []  # type: list
 follow_mouse_focus = True
 bring_front_click = False
 cursor_warp = False
-floating_layout = layout.Floating(
-    border_focus=colors[8],
+# Float rules are looked up in a compiled index; see floatrules.py.
+floating_layout = floatrules.Floating(
+    border_focus=colors.border_focus,
     border_width=2,
     float_rules=[
         # Run the utility of `xprop` to see the wm class and name of an X client.
@@ -903,7 +996,13 @@ floating_layout = layout.Floating(
 )
 auto_fullscreen = True
 focus_on_window_activation = "smart"
-reconfigure_screens = True
+# Screen changes are handled incrementally by outputs.reconfigure().
+reconfigure_screens = False
+
+@hook.subscribe.screen_change
+@latency.timed("hook screen_change")
+def _screen_change(event):
+    outputs.reconfigure(qtile)
 
 # If things like steam games want to auto-minimize themselves when losing
 # focus, should we respect this or not?
@@ -912,11 +1011,6 @@ auto_minimize = True
 # When using the Wayland backend, this can be used to configure input devices.
 wl_input_rules = None
 
-@hook.subscribe.startup_once
-def start_once():
-    home = os.path.expanduser('~')
-    subprocess.call([home + '/.config/qtile/autostart.sh'])
-
 # XXX: Gasp! We're lying here. In fact, nobody really uses or cares about this
 # string besides java UI toolkits; you can see several discussions on the
 # mailing lists, GitHub issues, and other WM documentation that suggest setting
@@ -927,4 +1021,6 @@ def start_once():
 # java that happens to be on java's whitelist.
 wmname = "LG3D"
 
+profiler.write()
+
 
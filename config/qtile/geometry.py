@@ -0,0 +1,149 @@
+# MonadTall, MonadWide, MonadThreeCol, Tile and Spiral with memoized geometry.
+#
+# These layouts recompute every window's rectangle on each layout pass, and a
+# pass happens on every focus change (mod+Tab, mod+j/k, clicking a window),
+# where nothing but the border colour changes. The classes here remember the
+# place() arguments for each position in the stack, keyed by everything the
+# rectangles depend on: the screen rectangle, the number of clients and the
+# layout's ratio, margin, border and size settings. grow, shrink, normalize,
+# the ratio commands, adding or removing a window and moving to another screen
+# all change the key, so the next pass computes the geometry again; a plain
+# focus change finds it and only places the windows.
+#
+# lazylayouts picks these up automatically, so config.py keeps writing
+# `lazylayouts.MonadTall(...)`.
+
+from libqtile import layout
+
+__all__ = ["MonadTall", "MonadWide", "MonadThreeCol", "Tile", "Spiral"]
+
+HIDDEN = object()
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class GeometryCache:
+    """Mixin for layouts whose client geometry only depends on the client's
+    index in the stack and on the attributes named in `_geometry_attrs`."""
+
+    _geometry_attrs = ()
+
+    def __init__(self, **config):
+        super().__init__(**config)
+        self._reset_geometry()
+
+    def _reset_geometry(self):
+        self._geometry = {}
+        self._geometry_key = None
+        self._pass_key = None
+        self._positions = None
+
+    def clone(self, group):
+        c = super().clone(group)
+        c._reset_geometry()
+        return c
+
+    def _geometry_cacheable(self, screen_rect):
+        """Also restores the state configure() would have set on the way."""
+        return True
+
+    def _key(self, screen_rect):
+        return (
+            screen_rect.x, screen_rect.y, screen_rect.width, screen_rect.height,
+            len(self.clients),
+        ) + tuple(_freeze(getattr(self, attr)) for attr in self._geometry_attrs)
+
+    def layout(self, windows, screen_rect):
+        # The key and the stack positions are worked out once per pass rather
+        # than once per window.
+        self._positions = {client: i for i, client in enumerate(self.clients)}
+        self._pass_key = self._key(screen_rect)
+        try:
+            super().layout(windows, screen_rect)
+        finally:
+            self._positions = None
+
+    def configure(self, client, screen_rect):
+        if not self._geometry_cacheable(screen_rect):
+            return super().configure(client, screen_rect)
+        if self._positions is not None:
+            index = self._positions.get(client)
+            key = self._pass_key
+        else:
+            index = self.clients.index(client) if client in self.clients else None
+            key = self._key(screen_rect)
+        if index is None:
+            return super().configure(client, screen_rect)
+
+        if key != self._geometry_key:
+            self._geometry = {}
+            self._geometry_key = key
+
+        placement = self._geometry.get(index)
+        if placement is None:
+            self._geometry[index] = self._record(client, screen_rect)
+            return
+        if placement is HIDDEN:
+            client.hide()
+            return
+
+        x, y, width, height, borderwidth, kwargs = placement
+        bordercolor = self.border_focus if client.has_focus else self.border_normal
+        client.place(x, y, width, height, borderwidth, bordercolor, **kwargs)
+        client.unhide()
+
+    def _record(self, client, screen_rect):
+        # Let the layout do its maths once and keep what it passed to place().
+        calls = []
+        place = client.place
+
+        def recording_place(x, y, width, height, borderwidth, bordercolor, **kwargs):
+            calls.append((x, y, width, height, borderwidth, kwargs))
+            place(x, y, width, height, borderwidth, bordercolor, **kwargs)
+
+        client.place = recording_place
+        try:
+            super().configure(client, screen_rect)
+        finally:
+            del client.place
+        # No place() means the layout hid the window (too small to show).
+        return calls[-1] if calls else HIDDEN
+
+
+class MonadTall(GeometryCache, layout.MonadTall):
+    _geometry_attrs = (
+        "ratio", "relative_sizes", "align", "border_width", "single_border_width",
+        "margin", "single_margin",
+    )
+
+    def _geometry_cacheable(self, screen_rect):
+        self.screen_rect = screen_rect
+        return bool(self.relative_sizes) and not getattr(self, "do_normalize", False)
+
+
+class MonadWide(GeometryCache, layout.MonadWide):
+    _geometry_attrs = MonadTall._geometry_attrs
+    _geometry_cacheable = MonadTall._geometry_cacheable
+
+
+class MonadThreeCol(GeometryCache, layout.MonadThreeCol):
+    _geometry_attrs = MonadTall._geometry_attrs + ("main_centered",)
+    _geometry_cacheable = MonadTall._geometry_cacheable
+
+
+class Tile(GeometryCache, layout.Tile):
+    _geometry_attrs = (
+        "ratio_size", "master_length", "expand", "border_width", "border_on_single",
+        "margin", "margin_on_single",
+    )
+
+
+class Spiral(GeometryCache, layout.Spiral):
+    # Spiral recomputes its layout_info whenever configure() sees a new
+    # screen rectangle object, so a pass served from here costs nothing
+    # and the next miss starts from fresh state anyway.
+    _geometry_attrs = ("ratio", "main_pane_ratio", "splits", "border_width", "margin")
@@ -0,0 +1,510 @@
+# Config reload that only applies what changed.
+#
+# lazy.reload_config() re-imports every module in this directory, finalizes
+# every widget, bar and layout, ungrabs every key and then builds all of it
+# again, which is a lot of work (and a visible flash of the bars) for
+# changing the description of one key.
+#
+# `hotreload.reload()` runs config.py again into a fresh module instead,
+# leaving the running config, the helper modules and their state alone, and
+# compares what it defines with what qtile is using:
+#
+#   keys             grabbed again if any binding changed
+#   mouse            buttons are grabbed again if any of them changed
+#   groups           new groups are added, removed ones deleted (their
+#                    windows move), changed labels and match rules updated
+#   layouts          every group keeps its instances of unchanged layouts,
+#                    with their state; changed or new ones are built afresh
+#                    and get the group's windows
+#   floating_layout  changed float rules and settings are set on the live
+#                    layout, which all groups share
+#   screens          a screen whose bars or widgets changed gets the new
+#                    bars, and its group is laid out again; the others are
+#                    not touched. What theme.py recolours follows the bars.
+#
+# and plain settings like follow_mouse_focus are copied over. Objects are
+# compared by what they were built from (class, arguments, the code of the
+# functions and lazy calls they refer to), not by identity, and colours by
+# their slot in the palette, so a scheme picked with dtos-colorscheme does not
+# look like a change.
+#
+# Hooks are not re-subscribed: the running config's handlers stay. A changed
+# hook handler, dgroups setting or reconfigure_screens is reported as
+# skipped, and so is any change to the helper modules (theme.py, outputs.py,
+# ...), which are not imported again; lazy.reload_config() picks those up.
+#
+#   Key([mod, "control"], "r", hotreload.reload()),
+#
+#   qtile cmd-obj -o cmd -f eval -a "__import__('hotreload').apply(self)"
+
+import time
+import types
+
+from libqtile import hook
+from libqtile.config import ScratchPad as ScratchPadConfig
+from libqtile.confreader import Config
+from libqtile.configurable import Configurable
+from libqtile.extension.base import _Extension
+from libqtile.lazy import LazyCall, lazy
+from libqtile.log_utils import logger
+from libqtile.scratchpad import ScratchPad
+from libqtile.widget.base import _Widget
+
+import colors
+import lazylayouts
+import notify
+import outputs
+import theme
+
+# Handled by the code below; everything else in Config is a plain setting.
+STRUCTURED = {
+    "keys", "mouse", "groups", "layouts", "floating_layout", "screens",
+    "widget_defaults", "extension_defaults",
+}
+# Read once when the config is loaded; only a full reload applies them.
+FULL_RELOAD = {"dgroups_key_binder", "dgroups_app_rules", "reconfigure_screens"}
+# Classes whose attributes are all configuration.
+DESCRIBED = ("libqtile.config", "libqtile.lazy", "libqtile.command")
+
+
+def _colour_slots():
+    return {
+        id(colour): slot
+        for palette in vars(colors).values() if isinstance(palette, colors.Palette)
+        for slot, colour in enumerate(palette)
+    }
+
+
+def fingerprint(obj, slots, depth=0):
+    """A comparable description of `obj` made of plain values."""
+    if id(obj) in slots:
+        return ("colour", slots[id(obj)])
+    if obj is None or isinstance(obj, (str, bytes, int, float)):
+        return obj
+    if depth > 12:
+        return type(obj).__qualname__
+    depth += 1
+    if isinstance(obj, (list, tuple)):
+        return (type(obj).__name__,) + tuple(fingerprint(o, slots, depth) for o in obj)
+    if isinstance(obj, (set, frozenset)):
+        return ("set",) + tuple(sorted(repr(fingerprint(o, slots, depth)) for o in obj))
+    if isinstance(obj, dict):
+        return ("dict",) + tuple(sorted(
+            (repr(k), fingerprint(v, slots, depth)) for k, v in obj.items()
+        ))
+    if isinstance(obj, type):
+        return ("class", obj.__module__, obj.__qualname__)
+    if isinstance(obj, types.CodeType):
+        return ("code", obj.co_code, obj.co_names, fingerprint(obj.co_consts, slots, depth))
+    if isinstance(obj, types.FunctionType):
+        return (
+            "function", obj.__qualname__,
+            fingerprint(obj.__code__, slots, depth),
+            fingerprint(obj.__defaults__, slots, depth),
+            fingerprint([c.cell_contents for c in obj.__closure__ or ()], slots, depth),
+        )
+    if isinstance(obj, types.MethodType):
+        # Not the instance: that is a live widget, layout, ...
+        return ("method", type(obj.__self__).__qualname__, fingerprint(obj.__func__, slots, depth))
+    if isinstance(obj, lazylayouts.LazyLayout):
+        return ("lazylayout", fingerprint(obj.cls, slots, depth), fingerprint(obj.config, slots, depth))
+    if isinstance(obj, Configurable):
+        return (type(obj).__qualname__, fingerprint(obj._user_config, slots, depth))
+    if isinstance(obj, LazyCall) or type(obj).__module__.startswith(DESCRIBED):
+        return (type(obj).__qualname__, fingerprint(vars(obj), slots, depth))
+    text = repr(obj)
+    return type(obj).__qualname__ if " at 0x" in text else text
+
+
+def _gap(gap, slots, tray):
+    if gap is None:
+        return None
+    widgets = [fingerprint(w, slots) for w in getattr(gap, "widgets", []) if w not in tray]
+    return (fingerprint(gap, slots), getattr(gap, "initial_size", gap.size), widgets)
+
+
+def _screen(screen, slots, tray):
+    return tuple(_gap(g, slots, tray) for g in (screen.top, screen.bottom, screen.left, screen.right))
+
+
+def _key_name(key):
+    return "+".join(list(key.modifiers) + [key.key])
+
+
+def _by_combo(keys):
+    # The last binding of a combination wins, as in qtile's keys_map.
+    return {(frozenset(m.lower() for m in key.modifiers), key.key.lower()): key for key in keys}
+
+
+def _hooks():
+    """Hook handlers by (registry, event): qtile's hooks and those of other
+    libraries, like qtile_extras."""
+    return {
+        (registry, event): list(funcs)
+        for registry, events in hook.subscriptions.items()
+        for event, funcs in events.items()
+    }
+
+
+def _config_hooks(subscriptions, subscribers, slots):
+    handlers = [
+        (event, func) for event, funcs in subscriptions.items() for func in funcs
+    ] + [(("theme", "colorscheme"), func) for func in subscribers]
+    return sorted(
+        (event, repr(fingerprint(func, slots))) for event, func in handlers
+        if getattr(func, "__module__", None) == "config"
+    )
+
+
+def _saved(obj):
+    return {k: list(v) if isinstance(v, list) else v for k, v in vars(obj).items()}
+
+
+def _load(path):
+    """config.py run into a new module, with the side effects it has on the
+    running session (hooks, theme subscriptions, outputs) undone."""
+    saved_hooks = {
+        registry: {event: list(funcs) for event, funcs in events.items()}
+        for registry, events in hook.subscriptions.items()
+    }
+    subscriptions = _hooks()
+    saved_theme = _saved(theme.theme)
+    saved_outputs = _saved(outputs.outputs)
+    module = types.ModuleType("config")
+    module.__file__ = path
+    try:
+        with open(path) as f:
+            code = compile(f.read(), path, "exec")
+        exec(code, vars(module))
+    finally:
+        # What the new module subscribed, to compare with the running one.
+        module_hooks = (
+            {
+                name: [f for f in funcs if f not in subscriptions.get(name, ())]
+                for name, funcs in _hooks().items()
+            },
+            theme.theme._subscribers[len(saved_theme["_subscribers"]):],
+        )
+        module_tray = outputs.outputs._tray
+        module_tracked = theme.theme._tracked[len(saved_theme["_tracked"]):]
+        hook.subscriptions.clear()
+        hook.subscriptions.update(saved_hooks)
+        vars(theme.theme).update(saved_theme)
+        vars(outputs.outputs).update(saved_outputs)
+    return module, module_hooks, module_tray, module_tracked
+
+
+class Reload:
+    def __init__(self, qtile, module, hooks, tray, tracked):
+        self.qtile = qtile
+        self.config = qtile.config
+        self.new = module
+        self.hooks = hooks
+        self.tray = tray
+        self.tracked = tracked
+        self.slots = _colour_slots()
+        self.report = {}
+
+    def fingerprint(self, obj):
+        return fingerprint(obj, self.slots)
+
+    def validate(self):
+        config = self.config
+        keys, mouse = config.keys, config.mouse
+        config.keys, config.mouse = self.new.keys, self.new.mouse
+        try:
+            config.validate()
+        finally:
+            config.keys, config.mouse = keys, mouse
+
+    def run(self):
+        self.validate()
+        self.keys()
+        self.mouse()
+        self.groups()
+        self.layouts()
+        self.floating()
+        self.screens()
+        self.settings()
+        return {name: value for name, value in self.report.items() if value}
+
+    def keys(self):
+        qtile = self.qtile
+        old = _by_combo(self.config.keys)
+        fingerprints = {combo: self.fingerprint(key) for combo, key in old.items()}
+        # Unchanged bindings keep their Key objects, the ones being dispatched.
+        keys = []
+        for key in self.new.keys:
+            combo = next(iter(_by_combo([key])))
+            if combo in old and fingerprints[combo] == self.fingerprint(key):
+                key = old[combo]
+            keys.append(key)
+        new = _by_combo(keys)
+        added = [combo for combo in new if combo not in old]
+        removed = [combo for combo in old if combo not in new]
+        changed = [combo for combo in new if combo in old and new[combo] is not old[combo]]
+        self.config.keys = keys
+        if added or removed or changed:
+            if qtile.chord_stack:
+                # Leaves the chord modes and grabs config.keys.
+                qtile.ungrab_all_chords()
+            else:
+                qtile.ungrab_keys()
+                for key in keys:
+                    qtile.grab_key(key)
+        self.report["keys"] = dict(
+            added=[_key_name(new[c]) for c in added],
+            removed=[_key_name(old[c]) for c in removed],
+            changed=[_key_name(new[c]) for c in changed],
+        ) if added or removed or changed else None
+
+    def mouse(self):
+        qtile = self.qtile
+        if self.fingerprint(self.config.mouse) == self.fingerprint(self.new.mouse):
+            return
+        self.config.mouse = self.new.mouse
+        qtile.core.ungrab_buttons()
+        qtile.mouse_map.clear()
+        for button in self.config.mouse:
+            qtile.grab_button(button)
+        self.report["mouse"] = True
+
+    def groups(self):
+        qtile = self.qtile
+        old = {g.name: g for g in self.config.groups}
+        new = {g.name: g for g in self.new.groups}
+        added = [name for name in new if name not in old]
+        removed = [name for name in old if name not in new]
+        changed = [
+            name for name in new
+            if name in old and self.fingerprint(old[name]) != self.fingerprint(new[name])
+        ]
+        dgroups = qtile.dgroups
+        for name in removed + changed:
+            matches = old[name].matches
+            dgroups.rules = [r for r in dgroups.rules if r.matchlist is not matches]
+            dgroups.groups_map.pop(name, None)
+        for name in removed:
+            try:
+                qtile.delete_group(name)
+            except ValueError:
+                logger.warning("hotreload: cannot delete group %s, one per screen is needed", name)
+        for name in added:
+            spec = new[name]
+            if isinstance(spec, ScratchPadConfig):
+                pad = ScratchPad(spec.name, spec.dropdowns, spec.label, spec.single)
+                pad._configure([self.config.floating_layout], self.config.floating_layout, qtile)
+                qtile.groups.append(pad)
+                qtile.groups_map[pad.name] = pad
+            else:
+                dgroups.add_dgroup(spec, start=spec.init)
+        for name in changed:
+            dgroups.add_dgroup(new[name])
+            group = qtile.groups_map.get(name)
+            if group is not None:
+                group.label = new[name].label
+        self.config.groups = [old[name] if name in old and name not in changed else g for name, g in new.items()]
+        dgroups.groups = self.config.groups
+        if changed:
+            hook.fire("changegroup")
+        self.report["groups"] = dict(added=added, removed=removed, changed=changed) \
+            if added or removed or changed else None
+
+    def layouts(self):
+        old = [self.fingerprint(layout) for layout in self.config.layouts]
+        new = [self.fingerprint(layout) for layout in self.new.layouts]
+        if old == new:
+            return
+        for group in self.qtile.groups:
+            if len(group.layouts) == len(old):  # not a ScratchPad or custom list
+                self._relayout(group, old, new)
+        before = [layout.name for layout in self.config.layouts]
+        after = [layout.name for layout in self.new.layouts]
+        self.config.layouts = self.new.layouts
+        self.report["layouts"] = dict(
+            added=[n for n in after if n not in before],
+            removed=[n for n in before if n not in after],
+            changed=[
+                n for n, f in zip(after, new) if n in before and old[before.index(n)] != f
+            ],
+        )
+
+    def _relayout(self, group, old, new):
+        unused = {}
+        for f, layout in zip(old, group.layouts):
+            unused.setdefault(repr(f), []).append(layout)
+        current = group.layout
+        tiled = [w for w in group.windows if w in group.tiled_windows]
+        layouts = []
+        for f, template in zip(new, self.new.layouts):
+            kept = unused.get(repr(f))
+            if kept:
+                layouts.append(kept.pop(0))
+                continue
+            layout = template.clone(group)
+            for win in tiled:
+                layout.add_client(win)
+            if group.current_window in tiled:
+                layout.focus(group.current_window)
+            layouts.append(layout)
+        for layout in [layout for left in unused.values() for layout in left]:
+            if layout is current and group.screen and getattr(layout, "built", True):
+                layout.hide()
+            layout.finalize()
+        if current in layouts:
+            index = layouts.index(current)
+        else:
+            index = next((i for i, l in enumerate(layouts) if l.name == current.name), 0)
+        group.layouts = layouts
+        group.current_layout = index
+        if group.layout is not current:
+            hook.fire("layout_change", group.layout, group)
+        if group.screen:
+            group.layout_all()
+
+    def floating(self):
+        live, new = self.config.floating_layout, self.new.floating_layout
+        changed = []
+        for attr in ("float_rules", "no_reposition_rules"):
+            if self.fingerprint(getattr(live, attr)) != self.fingerprint(getattr(new, attr)):
+                setattr(live, attr, getattr(new, attr))  # recompiled on next match
+                changed.append(attr)
+        for name, value in new._user_config.items():
+            if self.fingerprint(live._user_config.get(name)) != self.fingerprint(value):
+                live._user_config[name] = value
+                setattr(live, name, value)
+                changed.append(name)
+        if changed:
+            for group in self.qtile.groups:
+                if group.screen:
+                    group.layout_all()
+        self.report["floating_layout"] = changed
+
+    def screens(self):
+        qtile = self.qtile
+        for w in self.tray:
+            for gap in self.new.screens[0].gaps:
+                if w in getattr(gap, "widgets", []):
+                    gap.widgets.remove(w)
+        defaults = self.config.widget_defaults, self.config.extension_defaults
+        if self.fingerprint(defaults) != self.fingerprint((self.new.widget_defaults, self.new.extension_defaults)):
+            self.config.widget_defaults = _Widget.global_defaults = self.new.widget_defaults
+            self.config.extension_defaults = _Extension.global_defaults = self.new.extension_defaults
+            # Every widget was built with the old ones.
+            force = True
+            self.report["widget_defaults"] = True
+        else:
+            force = False
+        tray = outputs.outputs._tray
+        replaced = []
+        screens = outputs.outputs.screens(qtile)
+        for index, screen in enumerate(screens):
+            new = self.new.init_screen(index)
+            if force or _screen(screen, self.slots, tray) != _screen(new, self.slots, ()):
+                outputs.outputs.replace_bars(qtile, screen, new)
+                replaced.append(index)
+        outputs.outputs.adopt(self.new.init_screen, self.new.init_tray)
+        # The new bars may be of another size than the old ones.
+        for index in replaced:
+            screen = screens[index]
+            if screen in qtile.screens and screen.group is not None:
+                screen.group.layout_all()
+        self.retrack(screens)
+        self.report["screens"] = replaced
+
+    def retrack(self, screens):
+        """Have theme.py recolour what the new config.py built and is used now.
+
+        _load() undid the new module's theme.track() calls with its other
+        side effects, but its widget_defaults may be qtile's now and its
+        widgets be in the bars of screens not shown (which theme.py only
+        reaches through tracking). Widgets are tracked while they are in a
+        bar of any screen, shown or not; of the other tracked objects (the
+        defaults and layout_theme dicts) the new module's replace the old
+        ones, except for the defaults qtile kept using."""
+        in_bars = {
+            id(w) for screen in screens for gap in screen.gaps
+            for w in getattr(gap, "widgets", [])
+        }
+        in_use = (self.config.widget_defaults, self.config.extension_defaults)
+        tracked, seen = [], set()
+        for obj in theme.theme._tracked + self.tracked:
+            if id(obj) in seen:
+                continue
+            if isinstance(obj, _Widget):
+                keep = id(obj) in in_bars
+            else:
+                keep = any(obj is o for o in in_use) or any(obj is o for o in self.tracked)
+            if keep:
+                seen.add(id(obj))
+                tracked.append(obj)
+        theme.theme._tracked = tracked
+
+    def settings(self):
+        changed, skipped = [], []
+        for name in Config.__annotations__:
+            if name in STRUCTURED or not hasattr(self.new, name):
+                continue
+            value = getattr(self.new, name)
+            if self.fingerprint(getattr(self.config, name, None)) == self.fingerprint(value):
+                continue
+            if name in FULL_RELOAD:
+                skipped.append(name)
+                continue
+            setattr(self.config, name, value)
+            if name == "wmname" and hasattr(self.qtile.core, "wmname"):
+                self.qtile.core.wmname = value
+            changed.append(name)
+        hooks = _config_hooks(*self.hooks, self.slots)
+        if hooks != _config_hooks(_hooks(), theme.theme._subscribers, self.slots):
+            skipped.append("hooks")
+        self.report["settings"] = changed
+        self.report["skipped"] = skipped
+
+
+def apply(qtile):
+    """Reload config.py, applying only what changed; returns what that was."""
+    start = time.perf_counter()
+    try:
+        report = Reload(qtile, *_load(qtile.config.file_path)).run()
+    except Exception as e:
+        logger.exception("Configuration error:")
+        notify.notify("Configuration error", str(e), tag="qtileconfig", urgency=notify.CRITICAL)
+        return dict(error=str(e))
+    report["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Reloaded the config incrementally: %s", report)
+    return report
+
+
+def summary(report):
+    """One line for a notification."""
+    if "error" in report:
+        return report["error"]
+    parts = []
+    for name in ("keys", "groups", "layouts"):
+        if name in report:
+            count = sum(len(v) for v in report[name].values())
+            parts.append("{}: {}".format(name, count))
+    for name in ("mouse", "floating_layout", "widget_defaults"):
+        if name in report:
+            parts.append(name)
+    if report.get("screens"):
+        parts.append("screens: {}".format(len(report["screens"])))
+    if report.get("settings"):
+        parts.append(", ".join(report["settings"]))
+    line = "changed: " + (", ".join(parts) if parts else "nothing")
+    if report.get("skipped"):
+        line += "\nneeds a full reload: " + ", ".join(report["skipped"])
+    return "{}\n{} ms".format(line, report["ms"])
+
+
+def _reload(qtile):
+    report = apply(qtile)
+    if "error" not in report:
+        notify.notify("Configuration Reloaded!", summary(report), tag="qtileconfig", urgency=notify.LOW)
+
+
+def reload():
+    """A lazy call reloading the config incrementally, with a notification
+    saying what changed."""
+    return lazy.function(_reload)
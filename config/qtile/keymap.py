@@ -0,0 +1,99 @@
+# Duplicate key bindings merged or reported when config.py is loaded.
+#
+# qtile grabs every entry of `keys` on its own, so a combination bound twice
+# is grabbed twice and the last binding silently wins.
+#
+# `keymap.compile(keys)` runs once when config.py is loaded:
+#
+#   - bindings of the same combination whose commands are all restricted to
+#     disjoint layouts (`.when(layout=...)`) are merged into one Key, so one
+#     combination can grow windows in monadtall and change the ratio in tile;
+#   - any other duplicate is a conflict: it is logged, and the last binding
+#     wins as before, but it is the only one left in the list, so it is
+#     grabbed once.
+#
+# The same is done for the keys of every KeyChord. Dispatching key presses,
+# chords and modes is left to qtile.
+#
+#   keys = keymap.compile(keys)
+#
+#   qtile cmd-obj -o cmd -f eval -a "__import__('keymap').info()"
+#
+# `qtile_bench keys` times qtile's dispatch of the compiled keys.
+
+import collections
+
+from libqtile.config import Key, KeyChord
+from libqtile.log_utils import logger
+
+Conflict = collections.namedtuple("Conflict", "chord combo kept dropped")
+
+
+def _combo(key):
+    return (frozenset(m.lower() for m in key.modifiers), key.key)
+
+
+def _name(key):
+    return "+".join(list(key.modifiers) + [key.key])
+
+
+def _layouts(key):
+    """The layouts all of `key`'s commands are restricted to, or None."""
+    if isinstance(key, KeyChord) or not key.commands:
+        return None
+    layouts = set()
+    for cmd in key.commands:
+        if not cmd._layouts:
+            return None
+        layouts |= cmd._layouts
+    return layouts
+
+
+def _mergeable(a, b):
+    la, lb = _layouts(a), _layouts(b)
+    return la is not None and lb is not None and not la & lb
+
+
+class Keymap:
+    def __init__(self):
+        self.conflicts = []
+        self.merged = []
+
+    def compile(self, keys):
+        """`keys` without duplicate combinations; see the top of this file."""
+        self.conflicts = []
+        self.merged = []
+        return self._compile(keys, "root")
+
+    def _compile(self, keys, chord):
+        table = {}
+        for key in keys:
+            if isinstance(key, KeyChord):
+                key.submappings = self._compile(key.submappings, key.name or _name(key))
+            combo = _combo(key)
+            previous = table.get(combo)
+            if previous is None:
+                table[combo] = key
+            elif _mergeable(previous, key):
+                table[combo] = Key(
+                    list(previous.modifiers), previous.key, *previous.commands, *key.commands,
+                    desc=" / ".join(k.desc for k in (previous, key) if k.desc),
+                )
+                self.merged.append("{}: {}".format(chord, _name(key)))
+            else:
+                conflict = Conflict(chord, _name(key), key.desc, previous.desc)
+                logger.warning("keymap: %s %s bound twice, %r wins over %r", *conflict)
+                self.conflicts.append(conflict)
+                table[combo] = key
+        return list(table.values())
+
+    def info(self):
+        return dict(
+            conflicts=[c._asdict() for c in self.conflicts],
+            merged=self.merged,
+        )
+
+
+keymap = Keymap()
+compile = keymap.compile
+info = keymap.info
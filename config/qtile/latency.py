@@ -0,0 +1,181 @@
+# Latency histograms for key bindings, hooks and widget clicks.
+#
+# When qtile stutters it is hard to tell which binding, hook or click handler
+# held up the event loop. The helpers below wrap them so that every run is
+# timed and counted in a histogram under a readable name ("key mod4+Return",
+# "hook startup run index", "click memory Button1", ...); any run slower than
+# `threshold_ms` is also logged as a warning.
+#
+#   latency.keys(keys)                  every Key, and the keys inside KeyChords
+#   latency.mouse_callbacks(widgets)    every widget's mouse_callbacks
+#   @latency.timed("hook ...")          a hook handler or any other function
+#
+# Lazy commands run synchronously on qtile's event loop, so the time recorded
+# for a key is the time the loop was blocked by it; work a command schedules
+# for later (a spawn, a coroutine) is not included. Keys are timed around
+# qtile's own dispatch, which install() wraps, so they behave exactly as
+# without the timing.
+#
+# The numbers are available through qtile's eval command:
+#
+#   qtile cmd-obj -o cmd -f eval -a "__import__('latency').stats.summary()"
+#   qtile cmd-obj -o cmd -f eval -a "__import__('latency').stats.reset()"
+#   qtile cmd-obj -o cmd -f eval -a "__import__('latency').stats.set_threshold(25)"
+
+import bisect
+import functools
+import time
+
+from libqtile.command import interface
+from libqtile.lazy import LazyCall
+from libqtile.log_utils import logger
+
+# Upper bounds of the histogram buckets, in milliseconds.
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 16, 25, 50, 100, 250, 500, 1000, float("inf"))
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile."""
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return dict(
+            count=self.count,
+            mean_ms=round(self.total / self.count, 3) if self.count else 0,
+            p50_ms=round(self.percentile(50), 3),
+            p95_ms=round(self.percentile(95), 3),
+            p99_ms=round(self.percentile(99), 3),
+            max_ms=round(self.max, 3),
+            buckets={
+                ("<=" + str(bound) if bound != float("inf") else ">" + str(BUCKETS[-2])): n
+                for bound, n in zip(BUCKETS, self.counts) if n
+            },
+        )
+
+
+class Stats:
+    def __init__(self, threshold_ms=50):
+        self.threshold_ms = threshold_ms
+        self.histograms = {}
+
+    def record(self, name, ms):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(ms)
+        if ms > self.threshold_ms:
+            logger.warning("Slow: %s took %.1f ms", name, ms)
+
+    def summary(self):
+        return {name: h.summary() for name, h in sorted(self.histograms.items())}
+
+    def reset(self):
+        self.histograms.clear()
+
+    def set_threshold(self, ms):
+        self.threshold_ms = float(ms)
+
+
+# Unlike the other modules' state, the numbers survive lazy.reload_config():
+# the reload itself is one of the things worth measuring.
+if "stats" not in globals():
+    stats = Stats()
+
+
+def timed(name):
+    """Decorator recording each call of the function under `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+def install(qtile):
+    """Time qtile's dispatch of the keys named by keys()."""
+    process = getattr(qtile.process_key_event, "__wrapped__", qtile.process_key_event)
+
+    @functools.wraps(process)
+    def process_key_event(keysym, mask):
+        start = time.perf_counter()
+        key, swallowed = process(keysym, mask)
+        name = getattr(key, "_latency", None)
+        if name is not None:
+            stats.record(name, (time.perf_counter() - start) * 1000)
+        return key, swallowed
+
+    qtile.process_key_event = process_key_event
+
+
+def _click(widget, name, cmd):
+    # What _Widget.button_press() does with a lazy callback.
+    start = time.perf_counter()
+    try:
+        if cmd.check(widget.qtile):
+            status, val = widget.qtile.server.call(
+                (cmd.selectors, cmd.name, cmd.args, cmd.kwargs, False)
+            )
+            if status in (interface.ERROR, interface.EXCEPTION):
+                logger.error("Mouse callback command error %s: %s", cmd.name, val)
+    finally:
+        stats.record(name, (time.perf_counter() - start) * 1000)
+
+
+def _key_name(key, prefix):
+    return "key " + "+".join(list(prefix) + list(key.modifiers) + [key.key])
+
+
+def keys(key_list, prefix=()):
+    """Name every Key in `key_list` for install()'s timing, descending into
+    KeyChords."""
+    for key in key_list:
+        submappings = getattr(key, "submappings", None)
+        if submappings is not None:
+            chord = list(prefix) + ["+".join(list(key.modifiers) + [key.key])]
+            keys(submappings, chord)
+            continue
+        if key.commands:
+            key._latency = _key_name(key, prefix)
+    return key_list
+
+
+def mouse_callbacks(widgets):
+    """Time the mouse_callbacks of every widget in `widgets`."""
+    for widget in widgets:
+        callbacks = getattr(widget, "mouse_callbacks", None)
+        if not callbacks or getattr(widget, "_latency", False):
+            continue
+        for button, callback in list(callbacks.items()):
+            name = "click {} {}".format(widget.name, button)
+            if isinstance(callback, LazyCall):
+                callbacks[button] = functools.partial(_click, widget, name, callback)
+            else:
+                callbacks[button] = timed(name)(callback)
+        widget._latency = True
+    return widgets
@@ -0,0 +1,163 @@
+# Spawning through the fork server in scripts/qtile_launcher.
+#
+# lazy.spawn() forks qtile itself, a process with a few hundred MB mapped, and
+# every key binding in `keys` and the dmscripts KeyChord pays for that. The
+# autostart supervisor starts scripts/qtile_launcher, a small python process
+# that does the fork/exec on qtile's behalf. `launcher.spawn(cmd)` is a drop-in
+# replacement for `lazy.spawn(cmd)`: it sends the command over the launcher's
+# socket and falls back to qtile's own spawn if the launcher is not running.
+# Nothing on the event loop waits for the launcher: the first press after it
+# (re)started is spawned by qtile while the connection is being made. A
+# command is spawned by qtile only if it could not be sent; once sent, the
+# launcher may have started it already, so a launcher that does not answer
+# within half a second only loses its connection, which is made afresh.
+#
+# The request carries qtile's environment and working directory, so commands
+# start in the same ones as with lazy.spawn().
+#
+# Compare both ways with
+#
+#   qtile_bench spawn
+
+import asyncio
+import collections
+import json
+import os
+import shlex
+import subprocess
+
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or "/tmp",
+    "qtile-launcher.{}.sock".format(os.getuid()),
+)
+
+
+class Client:
+    """Connection to the launcher, run on qtile's event loop.
+
+    spawn() never waits: the request is written to the socket and the reply
+    is read by a separate task. Without a connection the command is spawned
+    by qtile instead and the connection is made. A launcher that does not
+    answer within `timeout` seconds (it is wedged, or died) is disconnected,
+    but what it was sent is not spawned again.
+    """
+
+    def __init__(self, path=SOCKET, timeout=0.5):
+        self.path = path
+        self.timeout = timeout
+        self._writer = None
+        self._reading = None
+        self._connecting = None
+        # (argv, timer) of the requests waiting for their reply; the
+        # launcher answers in order.
+        self._pending = collections.deque()
+
+    def spawn(self, argv, fallback):
+        """Have the launcher run `argv`, or call `fallback()` if it cannot."""
+        if self._writer is None:
+            self._start_connecting()
+            fallback()
+            return
+        try:
+            self._writer.write(json.dumps(_request(argv)).encode() + b"\n")
+        except (OSError, RuntimeError):
+            self._drop()
+            fallback()
+            return
+        timer = asyncio.get_running_loop().call_later(self.timeout, self._expired)
+        self._pending.append((argv, timer))
+
+    def _start_connecting(self):
+        if self._connecting is None:
+            self._connecting = asyncio.create_task(self._connect())
+
+    async def _connect(self):
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.path), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            return
+        finally:
+            self._connecting = None
+        self._writer = writer
+        self._reading = asyncio.create_task(self._read(reader, writer))
+
+    async def _read(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break  # the launcher was restarted or stopped
+                if not self._pending:
+                    continue
+                argv, timer = self._pending.popleft()
+                timer.cancel()
+                reply = json.loads(line)
+                if "error" in reply:
+                    logger.warning("launcher: cannot run %s: %s", argv[0], reply["error"])
+        except (OSError, ValueError):
+            pass
+        finally:
+            if self._writer is writer:
+                self._drop()
+
+    def _expired(self):
+        argv, _timer = self._pending[0]
+        logger.warning(
+            "launcher: no reply for %s within %ss, reconnecting", argv[0], self.timeout
+        )
+        self._drop()
+
+    def _drop(self):
+        """Close the connection. What is still waiting for a reply may have
+        been started, so it is not spawned again."""
+        writer, self._writer = self._writer, None
+        reading, self._reading = self._reading, None
+        if writer is not None:
+            writer.close()
+        if reading is not None and reading is not asyncio.current_task():
+            reading.cancel()
+        pending, self._pending = self._pending, collections.deque()
+        for _argv, timer in pending:
+            timer.cancel()
+
+    def close(self):
+        if self._connecting is not None:
+            self._connecting.cancel()
+            self._connecting = None
+        self._drop()
+
+
+def _request(argv):
+    request = {"argv": list(argv), "env": dict(os.environ)}
+    try:
+        request["cwd"] = os.getcwd()
+    except OSError:
+        pass  # removed since; the launcher stays in its own
+    return request
+
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+if "client" in globals():
+    client.close()  # noqa: F821
+client = Client()
+
+
+def launch(qtile, cmd, shell=False):
+    """Run `cmd` now; takes the same arguments as qtile.spawn()."""
+    if shell:
+        argv = ["/bin/sh", "-c", cmd if isinstance(cmd, str) else subprocess.list2cmdline(cmd)]
+    elif isinstance(cmd, str):
+        argv = shlex.split(cmd)
+    else:
+        argv = list(cmd)
+    client.spawn(argv, lambda: qtile.spawn(cmd, shell=shell))
+
+
+def spawn(cmd, shell=False):
+    """Like lazy.spawn(cmd, shell), but forked by scripts/qtile_launcher."""
+    return lazy.function(launch, cmd, shell)
@@ -0,0 +1,107 @@
+# Deferred construction of the entries in `layouts`.
+#
+# qtile gives every group its own clone of every layout in `layouts`, so 15
+# layouts and 9 groups used to mean 150 layout objects, nearly all of which are
+# never shown. `lazylayouts.MonadTall(...)` takes the same arguments as
+# `layout.MonadTall(...)` but only keeps the class and its config; each group
+# builds its instance the first time it actually switches to that layout
+# (its default layout, lazy.next_layout(), the Layouts KeyChord, ...).
+#
+# Until then the stand-in just remembers which tiled windows the group handed
+# it and which one had focus, and replays that into the real layout.
+#
+# Layouts with a memoized variant in geometry.py are built from that one.
+
+from libqtile import layout
+
+import geometry
+
+
+class LazyLayout:
+    def __init__(self, cls, **config):
+        self.cls = cls
+        self.config = config
+        self.name = config.get("name", cls.__name__.lower())
+        self.group = None
+        self._layout = None
+        self._clients = []
+        self._focused = None
+
+    @property
+    def built(self):
+        return self._layout is not None
+
+    @property
+    def built_layout(self):
+        """The real layout, or None while it is still deferred."""
+        return self._layout
+
+    def clone(self, group):
+        c = LazyLayout(self.cls, **self.config)
+        c.group = group
+        return c
+
+    def _build(self):
+        if self._layout is None:
+            real = self.cls(**self.config).clone(self.group)
+            self._layout = real
+            for add, client in self._clients:
+                getattr(real, add)(client)
+            if self._focused is not None:
+                real.focus(self._focused)
+            self._clients = None
+            self._focused = None
+        return self._layout
+
+    # The group calls these on *every* layout whenever a window is added,
+    # removed, focused or floated. They must not build anything.
+
+    def add(self, client):
+        if self._layout is not None:
+            return self._layout.add(client)
+        self._clients.append(("add", client))
+
+    def add_client(self, client, *args, **kwargs):
+        if self._layout is not None:
+            return self._layout.add_client(client, *args, **kwargs)
+        self._clients.append(("add_client", client))
+
+    def remove(self, client):
+        if self._layout is not None:
+            return self._layout.remove(client)
+        self._clients = [entry for entry in self._clients if entry[1] is not client]
+        if self._focused is client:
+            self._focused = None
+
+    def focus(self, client):
+        if self._layout is not None:
+            return self._layout.focus(client)
+        self._focused = client
+
+    def blur(self):
+        if self._layout is not None:
+            return self._layout.blur()
+        self._focused = None
+
+    def finalize(self):
+        if self._layout is not None:
+            self._layout.finalize()
+
+    def __getattr__(self, name):
+        # Anything else (show, layout, configure, commands, info, ...) means
+        # the layout is really being used.
+        if name.startswith("__") or name in ("_layout", "_clients", "_focused"):
+            raise AttributeError(name)
+        return getattr(self._build(), name)
+
+    def __repr__(self):
+        state = "built" if self.built else "deferred"
+        return "<LazyLayout {} ({})>".format(self.name, state)
+
+
+def __getattr__(name):
+    cls = getattr(geometry if name in geometry.__all__ else layout, name)
+
+    def spec(**config):
+        return LazyLayout(cls, **config)
+    return spec
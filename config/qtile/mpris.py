@@ -0,0 +1,244 @@
+# Mpris2 that scrolls a pre-rendered strip of text instead of re-rendering it.
+#
+# widget.Mpris2 scrolls by drawing the whole track string with pango again on
+# every tick (four times a second with scroll_interval = 0.25), on every bar
+# that shows it, and keeps doing so while the player is paused.
+#
+# This Mpris2 renders the text once into an offscreen image (a "strip") when
+# the text changes, i.e. per track and per play/pause, and every tick only
+# paints that image at the new offset. Widgets showing the same text in the
+# same font, colours, bar height and width, which are the Mpris2 widgets of
+# the other screens, share one strip and one scroll timer, so the text is
+# rendered once and ticks once however many bars there are. Scrolling stops,
+# timer and all, while the player is paused or stopped; the start of the text
+# is shown instead.
+#
+# Vertical bars and scroll_hide use the stock scrolling. The counters are
+# available over the command interface, e.g.
+#
+#   qtile cmd-obj -o widget mpris2 -f scroll_stats
+#   qtile cmd-obj -o widget mpris2 -f reset_scroll_stats
+
+import cairocffi
+from libqtile import pangocffi
+from qtile_extras import widget
+
+import colors
+
+# Cairo's limit on the size of an image surface.
+MAX_WIDTH = 32767
+
+
+class _Target:
+    """Enough of a Drawer for TextLayout.draw() to paint onto `surface`."""
+
+    def __init__(self, drawer, surface):
+        self.drawer = drawer
+        self.ctx = pangocffi.patch_cairo_context(cairocffi.Context(surface))
+
+    def set_source_rgb(self, colour):
+        # Palette colours come with their cairo tuple, parsed once per colour.
+        if type(colour) is colors.Colour:
+            self.ctx.set_source_rgba(*colour.rgba)
+        else:
+            self.drawer.set_source_rgb(colour, ctx=self.ctx)
+
+
+def _render(w):
+    """`w`'s text on a transparent strip as high as its bar."""
+    layout = w.layout
+    height = w.bar.height
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, layout.width + 2, height)
+    layout.drawer = _Target(w.drawer, surface)
+    try:
+        # Where _TextBox.draw() puts it.
+        layout.draw(0, int(height / 2.0 - layout.height / 2.0) + 1)
+    finally:
+        layout.drawer = w.drawer
+    surface.flush()
+    return surface
+
+
+class Scroller:
+    """A strip and its scroll position, for all widgets showing it."""
+
+    def __init__(self, key, w):
+        self.key = key
+        self.widgets = []
+        self.qtile = w.qtile
+        self.surface = _render(w)
+        self.text_width = w.layout.width
+        self.view_width = w._scroll_width - 2 * w.actual_padding
+        self.step = w.scroll_step
+        self.interval = w.scroll_interval
+        self.delay = w.scroll_delay
+        self.clear = w.scroll_clear
+        self.repeat = w.scroll_repeat
+        self.offset = 0
+        self.timer = None
+        self.ticks = 0
+
+    def update(self):
+        """Scroll while any of the widgets' players is playing."""
+        if any(w.is_playing for w in self.widgets):
+            if self.timer is None and self.offset == 0:
+                self.timer = self.qtile.call_later(self.delay, self._tick)
+        elif self.timer is not None or self.offset:
+            self.stop()
+            self._draw()
+
+    def _tick(self):
+        # _TextBox.do_scroll(), for all widgets at once.
+        self.timer = None
+        self.ticks += 1
+        self.offset += self.step
+        if self.clear:
+            done = self.offset > self.text_width
+        else:
+            done = self.text_width - self.offset < self.view_width
+        if not done:
+            self.timer = self.qtile.call_later(self.interval, self._tick)
+        elif self.repeat:
+            self.timer = self.qtile.call_later(self.delay, self._restart)
+        self._draw()
+
+    def _restart(self):
+        self.timer = None
+        self.offset = 0
+        self._draw()
+        self.update()
+
+    def _draw(self):
+        for w in self.widgets:
+            w.draw()
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.offset = 0
+
+    def close(self):
+        self.stop()
+        self.surface.finish()
+
+
+class Strips:
+    def __init__(self):
+        self.scrollers = {}
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.renders = 0
+        self.ticks = 0
+
+    def join(self, key, w):
+        scroller = self.scrollers.get(key)
+        if scroller is None:
+            scroller = self.scrollers[key] = Scroller(key, w)
+            self.renders += 1
+        scroller.widgets.append(w)
+        scroller.update()
+        return scroller
+
+    def leave(self, scroller, w):
+        if w in scroller.widgets:
+            scroller.widgets.remove(w)
+        if scroller.widgets:
+            scroller.update()
+            return
+        self.ticks += scroller.ticks
+        scroller.close()
+        if self.scrollers.get(scroller.key) is scroller:
+            del self.scrollers[scroller.key]
+
+
+# Like latency.py's numbers, the strips survive lazy.reload_config(): the old
+# widgets leave theirs when qtile finalizes them.
+if "strips" not in globals():
+    strips = Strips()
+
+
+class Mpris2(widget.Mpris2):
+    def __init__(self, **config):
+        widget.Mpris2.__init__(self, **config)
+        self._scroller = None
+        self.blits = 0
+
+    def _strip_key(self):
+        return (
+            self.formatted_text, self.markup, self.font, self.fontsize,
+            str(self.foreground), str(self.fontshadow), self.bar.height,
+            self._scroll_width, self.actual_padding, self.scroll_step,
+            self.scroll_interval, self.scroll_delay, self.scroll_clear, self.scroll_repeat,
+        )
+
+    def _scroller_for_text(self):
+        """The Scroller for the current text, or None for the stock scrolling."""
+        if not (
+            self._should_scroll and self.bar.horizontal and not self.scroll_hide
+            and self.layout.width + 2 <= MAX_WIDTH
+        ):
+            self._leave()
+            return None
+        key = self._strip_key()
+        if self._scroller is None or self._scroller.key != key:
+            self._leave()
+            self._scroller = strips.join(key, self)
+        return self._scroller
+
+    def _leave(self):
+        if self._scroller is not None:
+            scroller, self._scroller = self._scroller, None
+            strips.leave(scroller, self)
+
+    def draw(self):
+        if not self.can_draw():
+            return
+        scroller = self._scroller_for_text()
+        if scroller is None:
+            widget.Mpris2.draw(self)
+            return
+        self.blits += 1
+        self.drawer.clear(self.background or self.bar.background)
+        ctx = self.drawer.ctx
+        ctx.save()
+        ctx.rectangle(self.actual_padding, 0, scroller.view_width, self.bar.size)
+        ctx.clip()
+        ctx.set_source_surface(scroller.surface, self.actual_padding - scroller.offset, 0)
+        ctx.paint()
+        ctx.restore()
+        self.drawer.draw(
+            offsetx=self.offsetx, offsety=self.offsety, width=self.width, height=self.height
+        )
+
+    def parse_message(self, _interface_name, changed_properties, _invalidated_properties):
+        widget.Mpris2.parse_message(
+            self, _interface_name, changed_properties, _invalidated_properties
+        )
+        # Play/pause without a change of text does not draw.
+        if self._scroller is not None:
+            self._scroller.update()
+
+    def cmd_scroll_stats(self):
+        """Strips rendered and scroll ticks, over all Mpris2 widgets, and this
+        widget's repaints from its strip."""
+        scroller = self._scroller
+        return dict(
+            renders=strips.renders,
+            ticks=strips.ticks + sum(s.ticks for s in strips.scrollers.values()),
+            strips=len(strips.scrollers),
+            blits=self.blits,
+            sharing=len(scroller.widgets) if scroller is not None else 0,
+            scrolling=scroller is not None and scroller.timer is not None,
+        )
+
+    def cmd_reset_scroll_stats(self):
+        strips._reset_stats()
+        for scroller in strips.scrollers.values():
+            scroller.ticks = 0
+        self.blits = 0
+
+    def finalize(self):
+        self._leave()
+        widget.Mpris2.finalize(self)
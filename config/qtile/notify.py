@@ -0,0 +1,218 @@
+# Desktop notifications over one D-Bus session connection.
+#
+# Every notification from the config used to cost a process or a connection:
+# the reload/restart/shutdown keys spawned dunstify, libqtile's
+# send_notification() (volume, brightness, battery) connects to the session
+# bus, authenticates and says Hello for each call, and scripts/network_menu
+# ran `which notify-send` and then notify-send for every status line.
+#
+# `notify.notify(summary, body, tag=...)` keeps one connection open for the
+# whole session and remembers the id the server returned for each tag, so the
+# next notification with the same tag replaces the previous one in place
+# instead of stacking (the x-dunst-stack-tag hint is sent as well, for
+# notifications that still come from dunstify). Notifications with the same
+# tag arriving within `delay` seconds of each other are coalesced: only the
+# last one is sent, so holding down a volume key shows one notification that
+# keeps up rather than a queue of stale ones.
+#
+# From a key binding, or before a command that stops qtile's event loop (the
+# notification is sent first, then the command runs):
+#
+#   Key([mod], "F1", notify.send("Hello")),
+#   Key([mod, "control"], "q", notify.before("shutdown", "Exiting Qtile...")),
+#
+# Scripts outside qtile, which have PyGObject but no event loop of ours, use
+# the blocking client:
+#
+#   notifier = notify.SyncNotifier("networkmanager-dmenu")
+#   notifier.notify("Wifi scan running...", tag="scan")
+#   notifier.notify("Wifi scan complete", tag="scan")   # replaces the first
+
+import asyncio
+import logging
+
+# libqtile's logger, without importing libqtile (scripts use this module too).
+logger = logging.getLogger("libqtile")
+
+BUS_NAME = "org.freedesktop.Notifications"
+OBJECT_PATH = "/org/freedesktop/Notifications"
+INTERFACE = "org.freedesktop.Notifications"
+SIGNATURE = "susssasa{sv}i"
+
+LOW, NORMAL, CRITICAL = 0, 1, 2
+
+
+class Notifier:
+    """asyncio client for use inside qtile (needs dbus-next, like qtile's own
+    notifications)."""
+
+    def __init__(self, app_name="qtile", delay=0.05):
+        self.app_name = app_name
+        self.delay = delay
+        self._bus = None
+        self._lock = None
+        self._ids = {}
+        self._pending = {}
+        self._scheduled = {}
+        self._busy = set()
+        self.sent = 0
+        self.coalesced = 0
+
+    def notify(self, summary, body="", tag=None, urgency=NORMAL, timeout=-1, icon=""):
+        """Queue a notification; `tag` (default: the summary) identifies the
+        notification it replaces. `timeout` is in milliseconds, -1 leaves it
+        to the server."""
+        tag = tag or summary
+        if tag in self._pending:
+            self.coalesced += 1
+        self._pending[tag] = (summary, body, urgency, timeout, icon)
+        self._schedule(tag, self.delay)
+
+    def _schedule(self, tag, delay):
+        if tag in self._scheduled or tag in self._busy:
+            return  # picked up when the timer fires or the call in flight returns
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("notify: no event loop, dropping notification '%s'", tag)
+            self._pending.pop(tag, None)
+            return
+        self._scheduled[tag] = loop.call_later(delay, self._start, tag)
+
+    def _start(self, tag):
+        del self._scheduled[tag]
+        asyncio.ensure_future(self.flush(tag))
+
+    async def flush(self, tag):
+        """Send what is queued for `tag` now."""
+        args = self._pending.pop(tag, None)
+        if args is None:
+            return
+        timer = self._scheduled.pop(tag, None)
+        if timer is not None:
+            timer.cancel()
+        self._busy.add(tag)
+        try:
+            await self._send(tag, *args)
+        except Exception:
+            logger.exception("notify: cannot send '%s'", tag)
+            self._disconnect()
+        finally:
+            self._busy.discard(tag)
+            if tag in self._pending:
+                self._schedule(tag, 0)
+
+    async def _connect(self):
+        from dbus_next.aio import MessageBus
+        from dbus_next.constants import BusType
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._bus is None or not self._bus.connected:
+                self._bus = await MessageBus(bus_type=BusType.SESSION).connect()
+        return self._bus
+
+    async def _send(self, tag, summary, body, urgency, timeout, icon):
+        from dbus_next import Message, Variant
+        from dbus_next.constants import MessageType
+
+        bus = await self._connect()
+        hints = {
+            "urgency": Variant("y", urgency),
+            "x-dunst-stack-tag": Variant("s", tag),
+        }
+        reply = await bus.call(Message(
+            destination=BUS_NAME,
+            path=OBJECT_PATH,
+            interface=INTERFACE,
+            member="Notify",
+            signature=SIGNATURE,
+            body=[self.app_name, self._ids.get(tag, 0), icon, summary, body, [], hints, timeout],
+        ))
+        if reply.message_type == MessageType.ERROR:
+            logger.warning("notify: %s: %s", reply.error_name, reply.body)
+            return
+        self._ids[tag] = reply.body[0]
+        self.sent += 1
+
+    def _disconnect(self):
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None
+
+    def close(self):
+        for timer in self._scheduled.values():
+            timer.cancel()
+        self._scheduled.clear()
+        self._pending.clear()
+        self._disconnect()
+
+
+class SyncNotifier:
+    """Blocking client for scripts, through Gio (PyGObject)."""
+
+    def __init__(self, app_name):
+        self.app_name = app_name
+        self._bus = None
+        self._ids = {}
+
+    def notify(self, summary, body="", tag=None, urgency=NORMAL, timeout=-1, icon=""):
+        from gi.repository import Gio, GLib
+
+        tag = tag or summary
+        try:
+            if self._bus is None:
+                self._bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+            hints = {
+                "urgency": GLib.Variant("y", urgency),
+                "x-dunst-stack-tag": GLib.Variant("s", tag),
+            }
+            reply = self._bus.call_sync(
+                BUS_NAME, OBJECT_PATH, INTERFACE, "Notify",
+                GLib.Variant("(" + SIGNATURE + ")", (
+                    self.app_name, self._ids.get(tag, 0), icon, summary, body, [], hints, timeout,
+                )),
+                GLib.VariantType("(u)"), Gio.DBusCallFlags.NONE, -1, None,
+            )
+        except GLib.Error as e:
+            logger.warning("notify: cannot send '%s': %s", tag, e.message)
+            return
+        self._ids[tag] = reply.unpack()[0]
+
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+if "notifier" in globals():
+    notifier.close()  # noqa: F821
+notifier = Notifier()
+notify = notifier.notify
+
+
+def _send(qtile, summary, body, kwargs):
+    notifier.notify(summary, body, **kwargs)
+
+
+def send(summary, body="", **kwargs):
+    """A lazy call showing a notification; takes notify()'s arguments."""
+    from libqtile.lazy import lazy
+    return lazy.function(_send, summary, body, kwargs)
+
+
+def _before(qtile, command, summary, body, kwargs):
+    async def run():
+        tag = kwargs.get("tag") or summary
+        notifier.notify(summary, body, **kwargs)
+        try:
+            await asyncio.wait_for(notifier.flush(tag), 1)
+        except asyncio.TimeoutError:
+            logger.warning("notify: no answer from the notification server")
+        getattr(qtile, "cmd_" + command)()
+    asyncio.ensure_future(run())
+
+
+def before(command, summary, body="", **kwargs):
+    """A lazy call that sends the notification and then runs qtile's
+    `command` (e.g. "restart" or "shutdown", which would stop the event loop
+    before a queued notification went out)."""
+    from libqtile.lazy import lazy
+    return lazy.function(_before, command, summary, body, kwargs)
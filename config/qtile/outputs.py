@@ -0,0 +1,256 @@
+# Screen reconfiguration that keeps the bars of monitors that are still there.
+#
+# With reconfigure_screens = True qtile handles every RandR change (docking,
+# plugging in a projector, a monitor waking up) by configuring every screen
+# from scratch: each surviving bar gets a new drawer and every one of its
+# widgets is configured again, while the bars of vanished monitors are killed
+# and their widgets finalized. With three bars of ~25 widgets each that is the
+# freeze you get when docking.
+#
+# `outputs.reconfigure(qtile)` compares the new outputs with the current
+# screens instead:
+#
+#   - a screen whose output is still there at the same position and size is
+#     left alone (only its index may change);
+#   - a screen whose output moved or changed size is configured again, like
+#     qtile would;
+#   - a screen whose output went away is parked: its bar window is hidden but
+#     the bar and its widgets are kept, and it is the first to be reused when
+#     another output appears, together with the group it was showing;
+#   - only when there is nothing to reuse is a new screen built.
+#
+# There can only be one Systray, and it belongs on the primary output, which
+# both xinerama and RandR list first. It is therefore not part of the widget
+# lists; `make_tray()` builds it (and whatever goes with it) for the first
+# screen, and when that screen changes it is finalized in the old bar and
+# built again at the end of the new primary bar. Tray icons re-dock by
+# themselves when the new tray announces itself.
+#
+# In config.py:
+#
+#   screens = outputs.init(make_screen, make_tray, count=3)
+#   reconfigure_screens = False
+#
+#   @hook.subscribe.screen_change
+#   def _screen_change(event):
+#       outputs.reconfigure(qtile)
+
+import time
+
+from libqtile import hook
+from libqtile.log_utils import logger
+
+import redraw
+
+
+def _geometry(screen):
+    return (screen.x, screen.y, screen.width, screen.height)
+
+
+def _outputs(qtile):
+    # The same aliasing as qtile's: outputs at the same position (mirrors)
+    # count once, with the largest size.
+    sizes = {}
+    for x, y, width, height in qtile.core.get_screen_info():
+        w, h = sizes.get((x, y), (0, 0))
+        sizes[(x, y)] = (max(w, width), max(h, height))
+    return [(x, y, w, h) for (x, y), (w, h) in sizes.items()]
+
+
+class Outputs:
+    def __init__(self):
+        self.make_screen = None
+        self.make_tray = None
+        self._spare = []
+        self._parked = []
+        self._tray = []
+        self._count = 0
+
+    def init(self, make_screen, make_tray, count=1):
+        """The initial `screens` for config.py.
+
+        `make_screen(n)` returns a Screen with its bar(s), without the tray;
+        `n` counts the screens built so far, so it differs for every call.
+        `make_tray()` returns the list of widgets appended to the primary
+        screen's top bar."""
+        self.make_screen = make_screen
+        self.make_tray = make_tray
+        screens = [make_screen(index) for index in range(count)]
+        self._tray = make_tray()
+        screens[0].top.widgets.extend(self._tray)
+        self._spare = list(screens)
+        self._count = count
+        return screens
+
+    def reconfigure(self, qtile):
+        start = time.perf_counter()
+        old = list(qtile.screens)
+        info = _outputs(qtile)
+
+        # Outputs that are exactly where they were keep their screen.
+        current = {_geometry(screen): screen for screen in old}
+        assigned = [current.pop(geometry, None) for geometry in info]
+        kept = {screen for screen in assigned if screen is not None}
+
+        # Screens not in use yet, in order of preference: old screens whose
+        # output moved, parked screens, screens from the config never shown.
+        spare = list(current.values())
+        spare += [s for s in self._parked if s not in spare]
+        spare += [s for s in self._spare if s not in spare and s not in old]
+        built = 0
+        for i, screen in enumerate(assigned):
+            if screen is None:
+                if spare:
+                    assigned[i] = spare.pop(0)
+                else:
+                    assigned[i] = self.make_screen(self._count)
+                    self._count += 1
+                    built += 1
+        parked = [s for s in old if s not in assigned]
+        for screen in parked:
+            self._park(screen)
+        self._parked = [s for s in self._parked + parked if s not in assigned]
+
+        for i, (screen, geometry) in enumerate(zip(assigned, info)):
+            if screen in kept:
+                screen.index = i
+                continue
+            self._show(qtile, screen, i, geometry, assigned)
+
+        qtile.screens = assigned
+        if qtile.current_screen not in assigned:
+            qtile.current_screen = assigned[0]
+        self._place_tray(qtile, assigned[0])
+
+        for group in qtile.groups:
+            if group.screen is not None and group.screen not in kept:
+                group.layout_all()
+        hook.fire("screens_reconfigured")
+        logger.info(
+            "Reconfigured screens in %.1f ms: %d kept, %d reused, %d built, %d parked",
+            (time.perf_counter() - start) * 1000,
+            len(kept), len(assigned) - len(kept) - built, built, len(parked),
+        )
+
+    def _park(self, screen):
+        for gap in screen.gaps:
+            if getattr(gap, "window", None) is not None:
+                gap.window.hide()
+        if screen.group is not None and screen.group.screen is screen:
+            screen.group.hide()
+
+    def _show(self, qtile, screen, index, geometry, assigned):
+        # Bring back the group the screen showed before it was parked, unless
+        # another screen has it now.
+        group = getattr(screen, "group", None)
+        if group is None or group.screen not in (None, screen):
+            taken = {s.group for s in assigned if getattr(s, "group", None) is not None}
+            group = next(
+                (g for g in qtile.groups if g.screen is None and g not in taken),
+                None,
+            )
+            if group is None:
+                qtile.add_group("autogen_{}".format(index + 1))
+                group = qtile.groups[-1]
+        # set_group() would hide the screen's previous group, wherever it is
+        # shown now.
+        screen.group = group
+
+        bars = [gap for gap in screen.gaps if getattr(gap, "window", None) is not None]
+        if bars and screen.qtile is not None and _geometry(screen) == geometry:
+            # A parked screen coming back on the same output: nothing about
+            # its bars has changed, they only need to be shown again.
+            screen.index = index
+            screen.set_group(group)
+        else:
+            reconfigure = screen.qtile is not None
+            screen._configure(qtile, index, *geometry, group, reconfigure_gaps=reconfigure)
+        for gap in bars:
+            gap.window.unhide()
+            gap.draw()
+
+    def _place_tray(self, qtile, primary):
+        bar = primary.top
+        if bar is None or all(w in bar.widgets for w in self._tray):
+            return
+        for w in self._tray:
+            old = getattr(w, "bar", None)
+            if old is not None and w in old.widgets:
+                old.widgets.remove(w)
+                old.draw()
+            for name, registered in list(qtile.widgets_map.items()):
+                if registered is w:
+                    del qtile.widgets_map[name]
+            if w.configured:
+                w.finalize()
+        self._tray = self.make_tray()
+        # Systray names its selection after the current screen's index; the
+        # tray always belongs to the X screen, which is screen 0 here.
+        current = qtile.current_screen
+        qtile.current_screen = primary
+        try:
+            for w in self._tray:
+                bar.widgets.append(w)
+                if bar._configure_widget(w):
+                    qtile.register_widget(w)
+                    if isinstance(bar, redraw.Bar):
+                        bar._hook(w)
+                else:
+                    bar.widgets.remove(w)
+        finally:
+            qtile.current_screen = current
+        bar.draw()
+
+    def screens(self, qtile):
+        """Every screen built so far: the shown ones, then the parked ones,
+        then those from the config that were never shown."""
+        screens = list(qtile.screens)
+        screens += [s for s in self._parked if s not in screens]
+        screens += [s for s in self._spare if s not in screens]
+        return screens
+
+    def adopt(self, make_screen, make_tray):
+        """Build later screens and trays with these (a reloaded config's)."""
+        self.make_screen = make_screen
+        self.make_tray = make_tray
+
+    def replace_bars(self, qtile, screen, new):
+        """Give `screen` the bars of `new`, a Screen from make_screen() that is
+        not shown, e.g. because its widgets changed in config.py. The screen
+        itself, its group and its windows stay as they are; the caller lays
+        the group out again once all bars are replaced."""
+        for gap in screen.gaps:
+            if getattr(gap, "window", None) is None:
+                continue  # never configured: parked before it was shown
+            for w in list(getattr(gap, "widgets", [])):
+                if w in self._tray:
+                    continue  # moved by _place_tray() below
+                for name, registered in list(qtile.widgets_map.items()):
+                    if registered is w:
+                        del qtile.widgets_map[name]
+                if w.configured:
+                    w.finalize()
+            gap.finalize()
+        screen.top, screen.bottom = new.top, new.bottom
+        screen.left, screen.right = new.left, new.right
+        if screen not in qtile.screens:
+            return  # configured by _show() when it is used again
+        for gap in screen.gaps:
+            gap._configure(qtile, screen)
+        self._place_tray(qtile, qtile.screens[0])
+
+    def close(self):
+        """Finalize the bars of parked screens; qtile only knows the others."""
+        for screen in self._parked:
+            for gap in screen.gaps:
+                if getattr(gap, "window", None) is not None:
+                    gap.kill_window()
+        self._parked = []
+
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+if "outputs" in globals():
+    outputs.close()  # noqa: F821
+outputs = Outputs()
+init = outputs.init
+reconfigure = outputs.reconfigure
@@ -0,0 +1,91 @@
+# Non-blocking replacement for widget.GenPollText.
+#
+# GenPollText runs its func in qtile's shared default executor with no limit on
+# how long it may take; a hung command keeps the thread forever and the widget
+# silently stops updating. PollText runs funcs on a small dedicated pool, waits
+# at most `timeout` seconds for each call and never queues a second call while
+# the first one is still stuck. Poll functions marked with @static are run once
+# and their value is shared by every widget (on every bar) that uses them.
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from libqtile.log_utils import logger
+from qtile_extras import widget
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+# Calls still stuck in the old pool are abandoned, not waited for.
+if "_pool" in globals():
+    _pool.shutdown(wait=False, cancel_futures=True)  # noqa: F821
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="polltext")
+_static_values = {}
+
+
+def static(func):
+    """Mark a poll function whose result never changes while qtile runs."""
+    func.static = True
+    return func
+
+
+@static
+def kernel_release():
+    # Same value as `uname -r`, without forking a shell from the WM.
+    with open("/proc/sys/kernel/osrelease") as f:
+        return f.read().strip()
+
+
+class PollText(widget.GenPollText):
+    """GenPollText running func on a bounded pool with a per-call timeout."""
+
+    defaults = [
+        ("timeout", 5, "Seconds to wait for func before skipping this update."),
+    ]
+
+    def __init__(self, **config):
+        widget.GenPollText.__init__(self, **config)
+        self.add_defaults(PollText.defaults)
+        self._running = None
+        self._task = None
+
+    def timer_setup(self):
+        self._task = asyncio.create_task(self._poll_once())
+
+    def _submit(self):
+        if getattr(self.func, "static", False):
+            future = _static_values.get(self.func)
+            if future is None or (future.done() and future.exception()):
+                future = _static_values[self.func] = asyncio.wrap_future(_pool.submit(self.poll))
+            return future, True
+        return asyncio.wrap_future(_pool.submit(self.poll)), False
+
+    async def _poll_once(self):
+        if self._running is not None and not self._running.done():
+            logger.warning("%s: previous poll still running, skipping update", self.name)
+            self.timeout_add(self.update_interval or self.timeout, self.timer_setup)
+            return
+
+        self._running, is_static = self._submit()
+        try:
+            result = await asyncio.wait_for(asyncio.shield(self._running), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s: poll took longer than %ss", self.name, self.timeout)
+            result = self.text
+        except Exception:
+            logger.exception("%s: poll() raised exceptions, not rescheduling", self.name)
+            return
+
+        if result is None:
+            logger.warning("%s: poll() returned None, not rescheduling", self.name)
+            return
+        self.update(result)
+
+        if is_static and self._running.done():
+            return
+        # Without an update_interval func is polled once, as in ThreadPoolText.
+        if self.update_interval is not None:
+            self.timeout_add(self.update_interval, self.timer_setup)
+
+    def finalize(self):
+        if self._task is not None:
+            self._task.cancel()
+        widget.GenPollText.finalize(self)
@@ -0,0 +1,315 @@
+# Process monitor popup for the Memory and DF widgets.
+#
+# Clicking those widgets used to start alacritty running htop or df: a whole
+# terminal, and a full /proc walk per htop refresh, just to glance at what is
+# using the machine. `procmon.toggle()` opens a popup under the bar instead,
+# with the top processes by CPU and by resident memory and the usage of every
+# mounted disk, refreshed once a second while it is open.
+#
+# Processes are read by ProcScanner, which keeps /proc/<pid>/stat open for the
+# processes it has seen and re-reads them with pread(); a tick costs one
+# listdir of /proc plus one read per process, and CPU usage is the difference
+# in CPU time since the previous tick. The popup's sources live in the shared
+# Sampler (see sampler.py): the CPU and memory totals are the very samples the
+# bar widgets show, the DF widget's "/" source serves the popup's "/" row, and
+# the process list is just another source. When the popup closes it
+# unsubscribes, so the process source stops, its files are closed and the
+# widgets' own sources go back to their usual interval.
+#
+# A binding for it:
+#
+#   Key([mod], "F11", procmon.toggle()),
+
+import os
+import threading
+import time
+
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+from qtile_extras.popup.toolkit import PopupRelativeLayout, PopupText
+
+import sampler
+import theme
+
+PROC = "/proc"
+TICKS = os.sysconf("SC_CLK_TCK")
+PAGE = os.sysconf("SC_PAGE_SIZE")
+# Filesystems that are not disks.
+VIRTUAL_FS = {
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs",
+    "devpts", "devtmpfs", "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs",
+    "overlay", "proc", "pstore", "ramfs", "securityfs", "squashfs", "sysfs",
+    "tmpfs", "tracefs",
+}
+
+
+class _Proc:
+    __slots__ = ("fd", "name", "ticks", "rss", "cpu")
+
+    def __init__(self, fd, name):
+        self.fd = fd
+        self.name = name
+        self.ticks = None
+        self.rss = 0
+        self.cpu = 0.0
+
+
+class ProcScanner:
+    """CPU and RSS of every process, from cached /proc/<pid>/stat files.
+
+    At most `max_open` stat files are kept open; processes beyond that are
+    opened and closed on every scan, which is slower but still correct."""
+
+    def __init__(self, proc=PROC, max_open=256):
+        self.proc = proc
+        self.max_open = max_open
+        self._procs = {}
+        self._open = 0
+        self._last = None
+        # scan() runs in the executor, close() on the event loop.
+        self._lock = threading.Lock()
+
+    def _read(self, pid, entry):
+        if entry is not None and entry.fd is not None:
+            return os.pread(entry.fd, 1024, 0), entry.fd
+        fd = os.open(os.path.join(self.proc, str(pid), "stat"), os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            data = os.pread(fd, 1024, 0)
+        except OSError:
+            os.close(fd)
+            raise
+        if entry is None and self._open < self.max_open:
+            self._open += 1
+            return data, fd
+        os.close(fd)
+        return data, None
+
+    def scan(self):
+        """[(pid, name, cpu percent of one core, rss bytes)] of all processes."""
+        with self._lock:
+            return self._scan()
+
+    def _scan(self):
+        now = time.monotonic()
+        elapsed = now - self._last if self._last is not None else None
+        if elapsed is None:
+            # First scan: the average since each process started, like ps.
+            with open(os.path.join(self.proc, "uptime")) as f:
+                uptime = float(f.read().split()[0])
+        seen = set()
+        for name in os.listdir(self.proc):
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            entry = self._procs.get(pid)
+            try:
+                data, fd = self._read(pid, entry)
+            except OSError:
+                # Gone since listdir, or a pid reused behind a cached fd.
+                self._drop(pid)
+                continue
+            end = data.rfind(b")")
+            fields = data[end + 2:].split()
+            if entry is None:
+                comm = data[data.find(b"(") + 1:end].decode(errors="replace")
+                entry = self._procs[pid] = _Proc(fd, comm)
+            ticks = int(fields[11]) + int(fields[12])
+            if elapsed is None:
+                age = uptime - int(fields[19]) / TICKS
+                entry.cpu = ticks / TICKS / age * 100 if age > 0 else 0.0
+            elif entry.ticks is not None and elapsed > 0:
+                entry.cpu = (ticks - entry.ticks) / TICKS / elapsed * 100
+            entry.ticks = ticks
+            entry.rss = int(fields[21]) * PAGE
+            seen.add(pid)
+        for pid in [pid for pid in self._procs if pid not in seen]:
+            self._drop(pid)
+        self._last = now
+        return [(pid, p.name, p.cpu, p.rss) for pid, p in self._procs.items()]
+
+    def _drop(self, pid):
+        entry = self._procs.pop(pid, None)
+        if entry is not None and entry.fd is not None:
+            os.close(entry.fd)
+            self._open -= 1
+
+    def close(self):
+        with self._lock:
+            for pid in list(self._procs):
+                self._drop(pid)
+            self._last = None
+
+
+def mounts():
+    """Mount points of real filesystems, one per device."""
+    found = []
+    devices = set()
+    try:
+        with open(os.path.join(PROC, "self", "mounts")) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ["/"]
+    for line in lines:
+        device, path, fstype = line.split()[:3]
+        if fstype in VIRTUAL_FS or device in devices or not device.startswith("/"):
+            continue
+        devices.add(device)
+        found.append(path.replace("\\040", " "))
+    return found or ["/"]
+
+
+def _size(n):
+    for unit in ("B", "K", "M", "G", "T"):
+        if n < 1024 or unit == "T":
+            return "{:.1f}{}".format(n, unit) if unit in "GT" else "{:.0f}{}".format(n, unit)
+        n /= 1024
+
+
+class Monitor:
+    def __init__(self, top=8, interval=1.0, width=560, font="Jetbrains Mono", fontsize=11):
+        self.top = top
+        self.interval = interval
+        self.width = width
+        self.font = font
+        self.fontsize = fontsize
+        self.scanner = ProcScanner()
+        self.popup = None
+        self._subscriptions = []
+        self._procs = []
+        self._cpu = None
+        self._memory = None
+        self._disks = {}
+        self._mounts = []
+
+    @property
+    def shown(self):
+        return self.popup is not None
+
+    def toggle(self, qtile):
+        if self.shown:
+            self.hide()
+        else:
+            self.show(qtile)
+
+    def show(self, qtile):
+        start = time.perf_counter()
+        self._mounts = mounts()
+        palette = theme.theme.palette
+        lines = 2 + 2 * (self.top + 2) + len(self._mounts) + 2
+        line = self.fontsize * 1.6
+        height = int(lines * line) + 20
+        text = dict(font=self.font, fontsize=self.fontsize, pos_x=0, width=1, wrap=False)
+        if palette is not None:
+            text["foreground"] = palette[1]
+        rows = [2, 2 * (self.top + 2), len(self._mounts) + 2]
+        controls = []
+        y = 0
+        for name, count in zip(("summary", "processes", "disks"), rows):
+            controls.append(PopupText(name=name, pos_y=y / lines, height=count / lines, v_align="top", **text))
+            y += count
+        self.popup = PopupRelativeLayout(
+            qtile,
+            width=self.width,
+            height=height,
+            controls=controls,
+            margin=10,
+            background=palette[0] if palette is not None else "000000",
+            border=palette[8] if palette is not None else "111111",
+            border_width=2,
+            # Closed by clicking the widget again, so that hide() runs.
+            close_on_click=False,
+            keyboard_navigation=False,
+        )
+        self.popup.show(x=-4, y=4, relative_to=3, relative_to_bar=True)
+
+        self._subscribe(qtile, "cpu", sampler.read_cpu, self._on_cpu)
+        self._subscribe(qtile, "memory", sampler.read_memory, self._on_memory)
+        self._subscribe(qtile, "procmon", self.scanner.scan, self._on_procs)
+        for path in self._mounts:
+            self._subscribe(
+                qtile, sampler.df_key(path), lambda path=path: sampler.read_df(path),
+                lambda value, path=path: self._on_disk(path, value),
+            )
+        logger.debug("procmon: popup shown in %.1f ms", (time.perf_counter() - start) * 1000)
+
+    def _subscribe(self, qtile, key, read, callback):
+        sampler.sampler.subscribe(qtile, key, read, self.interval, callback)
+        self._subscriptions.append((key, callback))
+
+    def hide(self):
+        for key, callback in self._subscriptions:
+            sampler.sampler.unsubscribe(key, callback)
+        self._subscriptions = []
+        self.scanner.close()
+        if self.popup is not None:
+            self.popup.kill()
+            self.popup = None
+        self._procs = []
+        self._cpu = self._memory = None
+        self._disks = {}
+
+    def _on_cpu(self, sample):
+        self._cpu = sample
+        self._update_summary()
+
+    def _on_memory(self, sample):
+        self._memory = sample
+        self._update_summary()
+
+    def _on_procs(self, procs):
+        self._procs = procs
+        if self.popup is None:
+            return
+        by_cpu = sorted(procs, key=lambda p: p[2], reverse=True)[:self.top]
+        by_rss = sorted(procs, key=lambda p: p[3], reverse=True)[:self.top]
+        out = ["{:>7} {:>6} {:>7}  {}".format("PID", "CPU%", "RSS", "TOP BY CPU")]
+        out += [self._row(p) for p in by_cpu]
+        out += ["", "{:>7} {:>6} {:>7}  {}".format("PID", "CPU%", "RSS", "TOP BY MEMORY")]
+        out += [self._row(p) for p in by_rss]
+        self.popup.update_controls(processes="\n".join(out))
+
+    @staticmethod
+    def _row(proc):
+        pid, name, cpu, rss = proc
+        return "{:>7} {:>6.1f} {:>7}  {}".format(pid, cpu, _size(rss), name)
+
+    def _on_disk(self, path, statvfs):
+        self._disks[path] = statvfs
+        if self.popup is None:
+            return
+        out = ["{:<24} {:>7} {:>7} {:>5}".format("MOUNT", "USED", "SIZE", "USE%")]
+        for mount in self._mounts:
+            st = self._disks.get(mount)
+            if st is None or not st.f_blocks:
+                continue
+            size = st.f_frsize * st.f_blocks
+            used = size - st.f_frsize * st.f_bfree
+            percent = used / (used + st.f_frsize * st.f_bavail) * 100
+            out.append("{:<24} {:>7} {:>7} {:>4.0f}%".format(mount[-24:], _size(used), _size(size), percent))
+        self.popup.update_controls(disks="\n".join(out))
+
+    def _update_summary(self):
+        if self.popup is None or self._cpu is None or self._memory is None:
+            return
+        load, _ = self._cpu
+        mem, swap = self._memory
+        summary = "CPU {:5.1f}%   Mem {} / {}   Swap {} / {}   {} processes".format(
+            load, _size(mem.used), _size(mem.total), _size(swap.used), _size(swap.total),
+            len(self._procs),
+        )
+        self.popup.update_controls(summary=summary)
+
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+if "monitor" in globals():
+    monitor.hide()  # noqa: F821
+monitor = Monitor()
+
+
+def _toggle(qtile):
+    monitor.toggle(qtile)
+
+
+def toggle():
+    """Open or close the process monitor popup."""
+    return lazy.function(_toggle)
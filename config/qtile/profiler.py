@@ -0,0 +1,118 @@
+# Startup/reload profiler for config.py.
+#
+# Off unless qtile is started with QTILE_PROFILE set to the path of a report
+# file, e.g. in ~/.xinitrc:
+#
+#   export QTILE_PROFILE=~/.cache/qtile/profile.json
+#
+# config.py marks its phases with `profiler.phase(...)`; phases opened with
+# objects=True also record how long the construction of every configurable
+# object (layouts, widgets, decorations) inside them took. The report is a
+# JSON file that is rewritten at the end of every config load or reload and
+# after each profiled startup_once hook.
+
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from libqtile.configurable import Configurable
+from libqtile.log_utils import logger
+
+REPORT = os.path.expanduser(os.environ.get("QTILE_PROFILE", ""))
+enabled = bool(REPORT)
+
+_started = time.time()
+_t0 = time.perf_counter()
+_records = []
+_stack = []
+_tracing = 0
+_constructing = {}
+
+
+def _record(kind, name, start, seconds):
+    _records.append(
+        dict(
+            kind=kind,
+            name=name,
+            parent="/".join(_stack) or None,
+            start=round(start - _t0, 6),
+            seconds=round(seconds, 6),
+        )
+    )
+
+
+def _tracer(frame, event, arg):
+    # Only the outermost __init__ of each object counts: a widget's __init__
+    # calls its base classes' __init__, which must not be recorded again.
+    if frame.f_code.co_name != "__init__" or event not in ("call", "return"):
+        return
+    obj = frame.f_locals.get("self")
+    if not isinstance(obj, Configurable):
+        return
+    if event == "call":
+        _constructing.setdefault(id(obj), (frame, time.perf_counter()))
+    else:
+        entry = _constructing.get(id(obj))
+        if entry is not None and entry[0] is frame:
+            del _constructing[id(obj)]
+            _record("object", type(obj).__name__, entry[1], time.perf_counter() - entry[1])
+
+
+@contextmanager
+def phase(name, objects=False):
+    if not enabled:
+        yield
+        return
+
+    global _tracing
+    if objects:
+        if not _tracing:
+            sys.setprofile(_tracer)
+        _tracing += 1
+    start = time.perf_counter()
+    _stack.append(name)
+    try:
+        yield
+    finally:
+        _stack.pop()
+        if objects:
+            _tracing -= 1
+            if not _tracing:
+                sys.setprofile(None)
+        _record("phase", name, start, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator recording the wall time of every call, e.g. for hooks."""
+    def decorator(func):
+        if not enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                result = func(*args, **kwargs)
+            write()
+            return result
+        return wrapper
+    return decorator
+
+
+def write():
+    if not enabled:
+        return
+    report = dict(
+        created=_started,
+        total=round(sum(r["seconds"] for r in _records if r["kind"] == "phase" and not r["parent"]), 6),
+        records=_records,
+    )
+    try:
+        os.makedirs(os.path.dirname(REPORT) or ".", exist_ok=True)
+        with open(REPORT, "w") as f:
+            json.dump(report, f, indent=1)
+    except OSError:
+        logger.exception("Cannot write profile report to %s", REPORT)
+
@@ -0,0 +1,111 @@
+# Bar that repaints in frames instead of once per widget request.
+#
+# Mpris2 scrolling, the clock, the metric widgets, WindowName and GroupBox all
+# ask for redraws independently, and every request is painted (and flushed to
+# the X server) on its own. This Bar collects the widgets that asked to be
+# redrawn and paints them together, at most `max_fps` times per second. A full
+# bar redraw requested in the same frame supersedes the individual ones.
+#
+# The counters are available over the command interface, e.g.
+#
+#   qtile cmd-obj -o bar top -f draw_stats
+#   qtile cmd-obj -o screen 1 bar top -f reset_draw_stats
+
+import time
+
+from libqtile import bar
+
+
+class Bar(bar.Bar):
+    defaults = [
+        ("max_fps", 30, "Maximum number of times per second the bar is repainted."),
+    ]
+
+    def __init__(self, widgets, size, **config):
+        bar.Bar.__init__(self, widgets, size, **config)
+        self.add_defaults(Bar.defaults)
+        self._dirty = {}
+        self._full = False
+        self._frame = None
+        self._last_frame = 0.0
+        self._in_frame = False
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.draws_requested = 0
+        self.draws_performed = 0
+        self.frames = 0
+
+    def _configure(self, qtile, screen, reconfigure=False):
+        bar.Bar._configure(self, qtile, screen, reconfigure=reconfigure)
+        for widget in self.widgets:
+            self._hook(widget)
+
+    def _hook(self, widget):
+        # Widgets moving to another bar (outputs.py) are hooked again; their
+        # draw() is only wrapped once and follows _frame_bar.
+        widget._frame_bar = self
+        if "_frame_draw" in vars(widget):
+            return
+        real_draw = widget._frame_draw = widget.draw
+
+        def draw():
+            bar = widget._frame_bar
+            if bar._in_frame:
+                bar.draws_performed += 1
+                real_draw()
+                return
+            bar.draws_requested += 1
+            bar._dirty[widget] = None
+            bar._schedule()
+
+        widget.draw = draw
+
+    def draw(self):
+        if not self.widgets:
+            return
+        self.draws_requested += 1
+        self._full = True
+        self._schedule()
+
+    def _schedule(self):
+        if self._frame is not None:
+            return
+        delay = max(0.0, self._last_frame + 1 / self.max_fps - time.monotonic())
+        self._frame = self.future = self.qtile.call_later(delay, self._draw_frame)
+
+    def _draw_frame(self):
+        self._frame = None
+        self._last_frame = time.monotonic()
+        self.frames += 1
+        dirty, self._dirty = self._dirty, {}
+        full, self._full = self._full, False
+
+        self._in_frame = True
+        try:
+            if full:
+                self._actual_draw()
+            else:
+                for widget in dirty:
+                    if widget in self.widgets:
+                        widget.draw()
+        finally:
+            self._in_frame = False
+
+    def finalize(self):
+        if self._frame is not None:
+            self._frame.cancel()
+            self._frame = None
+        bar.Bar.finalize(self)
+
+    def cmd_draw_stats(self):
+        """Redraws requested by widgets vs. draws actually performed."""
+        return dict(
+            requested=self.draws_requested,
+            performed=self.draws_performed,
+            frames=self.frames,
+            max_fps=self.max_fps,
+        )
+
+    def cmd_reset_draw_stats(self):
+        self._reset_stats()
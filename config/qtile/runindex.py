@@ -0,0 +1,277 @@
+# Resident index of the executables on $PATH for the mod1+F1 run menu.
+#
+# dm-run piped `dmenu_path` into dmenu, and dmenu_path stats every directory
+# on $PATH (and rebuilds its cache whenever one of them changed) before the
+# menu can show. Here the list is kept in memory: it is built once, in a worker
+# thread, and afterwards only the directories that inotify reports as changed
+# are rescanned, a second after the last change so that a package upgrade
+# costs one rescan rather than thousands.
+#
+# `runindex.run_menu()` writes the list straight to the menu's stdin and runs
+# the choice through the launcher (see launcher.py). The list is also written
+# to $XDG_RUNTIME_DIR/qtile-run-index whenever it changes, which dm-run reads
+# instead of calling dmenu_path, so rofi or a terminal menu can use it too:
+#
+#   rofi -dmenu -p Run < "$XDG_RUNTIME_DIR"/qtile-run-index
+#
+# With frecency=True (the default) commands picked from the menu are listed
+# first, ordered by how often and how recently they were run.
+
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+import time
+
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+import launcher
+
+RUNTIME_DIR = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+INDEX_FILE = os.path.join(RUNTIME_DIR, "qtile-run-index")
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".cache", "qtile", "run_history.json")
+
+# dm-run's dmenu flags.
+DMENU = [
+    "dmenu", "-i", "-l", "15", "-g", "1", "-X", "0", "-Y", "0", "-W", "680", "-bw", "2",
+    "-nf", "#dfdfdf", "-nb", "#0a1124", "-sb", "#f35645", "-sf", "#0a1124",
+    "-fn", "JetbrainsMono Nerd Font:size=10", "-c", "-p", "Run: ",
+]
+
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT = struct.Struct("iIII")
+
+
+def scan(directory):
+    """Names of the executable files in `directory`."""
+    names = set()
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return names
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and os.access(entry.path, os.X_OK):
+                    names.add(entry.name)
+            except OSError:
+                pass
+    return names
+
+
+class Inotify:
+    """Just enough of inotify(7) to learn which watched directories changed."""
+
+    def __init__(self):
+        path = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(path, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}
+
+    def watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self._paths[wd] = path
+
+    def changed(self):
+        """Directories with pending events."""
+        dirs = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return dirs
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size + length
+                if wd in self._paths:
+                    dirs.add(self._paths[wd])
+
+    def close(self):
+        os.close(self.fd)
+
+
+class RunIndex:
+    def __init__(self, frecency=True, delay=1.0):
+        self.frecency = frecency
+        self.delay = delay
+        self._dirs = {}
+        self._names = None
+        self._inotify = None
+        self._rescan = None
+        self._dirty = set()
+        self._history = None
+
+    def start(self):
+        """Build the index in the background and start watching $PATH.
+
+        Does nothing if it has been started already."""
+        if self._dirs:
+            return
+        path = []
+        for directory in os.environ.get("PATH", "").split(os.pathsep):
+            if directory and directory not in path and os.path.isdir(directory):
+                path.append(directory)
+        self._dirs = {directory: set() for directory in path}
+        try:
+            self._inotify = Inotify()
+        except (AttributeError, OSError):
+            logger.warning("Cannot watch $PATH with inotify, the run menu will not see new programs")
+        else:
+            for directory in path:
+                self._inotify.watch(directory)
+            asyncio.get_running_loop().add_reader(self._inotify.fd, self._on_inotify)
+        self._dirty.update(path)
+        self._schedule(0)
+
+    def _on_inotify(self):
+        self._dirty.update(self._inotify.changed())
+        self._schedule(self.delay)
+
+    def _schedule(self, delay):
+        if self._rescan is not None:
+            self._rescan.cancel()
+        self._rescan = asyncio.get_running_loop().call_later(
+            delay, lambda: asyncio.ensure_future(self._update())
+        )
+
+    async def _update(self):
+        self._rescan = None
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, lambda: {d: scan(d) for d in dirty})
+        self._dirs.update(results)
+        self._names = None
+        await loop.run_in_executor(None, self._write, self.names())
+        logger.debug(
+            "Run index: rescanned %d directories in %.1f ms",
+            len(dirty), (time.perf_counter() - start) * 1000,
+        )
+
+    def names(self):
+        """Sorted, de-duplicated names of all executables."""
+        if self._names is None:
+            names = set()
+            for found in self._dirs.values():
+                names |= found
+            self._names = sorted(names)
+        return self._names
+
+    def entries(self):
+        """Menu entries: frecent commands first, then every executable."""
+        names = self.names()
+        if not self.frecency:
+            return names
+        now = time.time()
+        history = self._load_history()
+        recent = sorted(history, key=lambda cmd: -_score(history[cmd], now))
+        seen = set(recent)
+        return recent + [name for name in names if name not in seen]
+
+    def record(self, cmd):
+        if not self.frecency:
+            return
+        history = self._load_history()
+        count, _ = history.get(cmd, (0, 0))
+        history[cmd] = (count + 1, time.time())
+        try:
+            os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+            with open(HISTORY_FILE, "w") as f:
+                json.dump(history, f)
+        except OSError:
+            logger.warning("Cannot save run history to %s", HISTORY_FILE)
+
+    def _load_history(self):
+        if self._history is None:
+            try:
+                with open(HISTORY_FILE) as f:
+                    self._history = {cmd: tuple(v) for cmd, v in json.load(f).items()}
+            except (OSError, ValueError):
+                self._history = {}
+        return self._history
+
+    def _write(self, names):
+        tmp = INDEX_FILE + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write("\n".join(names))
+                f.write("\n")
+            os.replace(tmp, INDEX_FILE)
+        except OSError:
+            logger.warning("Cannot write run index to %s", INDEX_FILE)
+
+    def close(self):
+        if self._rescan is not None:
+            self._rescan.cancel()
+            self._rescan = None
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+
+
+def _score(entry, now):
+    # Runs count for less the longer ago the last one was.
+    count, last = entry
+    age = now - last
+    if age < 3600:
+        weight = 4
+    elif age < 86400:
+        weight = 2
+    elif age < 7 * 86400:
+        weight = 1
+    else:
+        weight = 0.5
+    return count * weight
+
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+if "index" in globals():
+    index.close()  # noqa: F821
+index = RunIndex()
+
+
+async def _menu(qtile, cmd):
+    index.start()
+    entries = "\n".join(index.entries()).encode()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        )
+    except OSError:
+        logger.exception("Cannot run the menu %s", cmd[0])
+        return
+    out, _ = await proc.communicate(entries)
+    choice = out.decode().strip()
+    if proc.returncode or not choice:
+        return
+    index.record(choice)
+    # Like dm-run: whatever was typed goes to the shell.
+    launcher.launch(qtile, "export _JAVA_AWT_WM_NONREPARENTING=1; " + choice, shell=True)
+
+
+def _run_menu(qtile, cmd):
+    asyncio.ensure_future(_menu(qtile, cmd or DMENU))
+
+
+def run_menu(cmd=None):
+    """Show the run menu (dmenu with dm-run's look unless `cmd` is given)."""
+    return lazy.function(_run_menu, cmd)
@@ -0,0 +1,322 @@
+# Shared system-metrics sampler for the bars.
+#
+# Every screen gets its own copy of the widgets from init_widgets_list(), so
+# with three monitors the stock CPU, Memory, DF and Battery widgets would each
+# read /proc, statvfs and /sys three times per interval. The widgets below
+# subscribe to one module-level Sampler instead: every metric source is read
+# once per tick (in qtile's executor, so the event loop never blocks) and the
+# value is pushed to all subscribed widgets on all bars. As a bonus, the
+# numbers shown on every monitor always come from the same sample.
+
+import abc
+import functools
+import os
+
+import psutil
+from libqtile.log_utils import logger
+from libqtile.widget.battery import BatteryState
+from qtile_extras import widget
+
+import notify
+import uevent
+
+
+class _Source:
+    def __init__(self, interval):
+        self.interval = interval
+        self.subscribers = []
+        self.requested = {}
+        self.readers = {}
+        self.value = None
+        self.timer = None
+        self.future = None
+
+
+class Sampler:
+    """Reads each registered metric source once per tick and fans out the value.
+
+    Sources are identified by a key (e.g. "cpu" or "df:/"). Every subscriber
+    brings a function that reads it, and the one of the earliest subscriber
+    still there is used: when that widget goes away (its screen was unplugged,
+    the config reloaded) the next one's takes over. The source ticks at the
+    shortest interval requested by any of its current subscribers and stops
+    once the last subscriber is gone.
+    """
+
+    def __init__(self):
+        self.qtile = None
+        self._sources = {}
+
+    def subscribe(self, qtile, key, read, interval, callback):
+        self.qtile = qtile
+        source = self._sources.get(key)
+        if source is None:
+            source = self._sources[key] = _Source(interval)
+        source.interval = min(source.interval, interval)
+        source.subscribers.append(callback)
+        source.requested[callback] = interval
+        source.readers[callback] = read
+
+        if source.value is not None:
+            callback(source.value)
+        if source.timer is None and source.future is None:
+            self._tick(key, source)
+
+    def unsubscribe(self, key, callback):
+        source = self._sources.get(key)
+        if source is None or callback not in source.subscribers:
+            return
+        source.subscribers.remove(callback)
+        del source.requested[callback]
+        del source.readers[callback]
+        if source.requested:
+            # e.g. the procmon popup closing: back to the widgets' interval.
+            source.interval = min(source.requested.values())
+        if not source.subscribers:
+            if source.timer is not None:
+                source.timer.cancel()
+            del self._sources[key]
+
+    def request(self, key, callback, interval):
+        """Change how often `callback` wants `key` read; the source follows,
+        starting with its next tick, if no other subscriber wants it sooner."""
+        source = self._sources.get(key)
+        if source is not None and callback in source.requested:
+            source.requested[callback] = interval
+            source.interval = min(source.requested.values())
+
+    def refresh(self, key):
+        """Read `key` now instead of waiting for its next tick."""
+        source = self._sources.get(key)
+        if source is None or source.future is not None:
+            return
+        if source.timer is not None:
+            source.timer.cancel()
+        self._tick(key, source)
+
+    def _tick(self, key, source):
+        source.timer = None
+        read = next(iter(source.readers.values()))
+        source.future = self.qtile.run_in_executor(read)
+        source.future.add_done_callback(lambda future: self._on_done(key, source, future))
+
+    def _on_done(self, key, source, future):
+        source.future = None
+        if self._sources.get(key) is not source:
+            return  # everybody unsubscribed while we were reading
+
+        try:
+            source.value = future.result()
+        except Exception:
+            logger.exception("Reading metric source '%s' failed", key)
+        else:
+            for callback in list(source.subscribers):
+                try:
+                    callback(source.value)
+                except Exception:
+                    logger.exception("Metric subscriber for '%s' failed", key)
+
+        source.timer = self.qtile.call_later(source.interval, self._tick, key, source)
+
+
+sampler = Sampler()
+
+
+# Readers for the sources shared between the widgets below and procmon.py.
+# Any subscriber's reader may be the one in use for a key, so both sides must
+# read (and return) exactly the same thing.
+
+def read_cpu():
+    return psutil.cpu_percent(), psutil.cpu_freq()
+
+
+def read_memory():
+    return psutil.virtual_memory(), psutil.swap_memory()
+
+
+def df_key(path):
+    return "df:" + path
+
+
+def read_df(path):
+    return os.statvfs(path)
+
+
+class _SharedPoll(abc.ABC):
+    """Mixin turning a ThreadPoolText widget into a Sampler subscriber.
+
+    Subclasses split the stock poll() in two: sample() does the expensive read
+    and runs once per tick for all bars, render() formats a sample for this
+    particular widget and runs on the event loop.
+    """
+
+    @abc.abstractmethod
+    def sample_key(self):
+        """The Sampler key; widgets with the same key share their samples."""
+
+    @abc.abstractmethod
+    def sample(self):
+        """Read the metric; runs in the executor."""
+
+    @abc.abstractmethod
+    def render(self, sample):
+        """The text for `sample`."""
+
+    def timer_setup(self):
+        self._sampler = sampler
+        self._sample_key = self.sample_key()
+        self._sampler.subscribe(
+            self.qtile, self._sample_key, self.sample, self.update_interval, self._on_sample
+        )
+
+    def _on_sample(self, sample):
+        self.update(self.render(sample))
+
+    def poll(self):
+        return self.render(self.sample())
+
+    def finalize(self):
+        if hasattr(self, "_sampler"):
+            self._sampler.unsubscribe(self._sample_key, self._on_sample)
+        super().finalize()
+
+
+class CPU(_SharedPoll, widget.CPU):
+    # psutil.cpu_percent() measures since its *previous* call, process-wide, so
+    # one widget per bar polling it used to split each second into three short
+    # windows. Sampling it once per tick gives every bar the same, real value.
+    def sample_key(self):
+        return "cpu"
+
+    def sample(self):
+        return read_cpu()
+
+    def render(self, sample):
+        load, freq = sample
+        return self.format.format(
+            load_percent=round(load, 1),
+            freq_current=round(freq.current / 1000, 1),
+            freq_max=round(freq.max / 1000, 1),
+            freq_min=round(freq.min / 1000, 1),
+        )
+
+
+class Memory(_SharedPoll, widget.Memory):
+    def sample_key(self):
+        return "memory"
+
+    def sample(self):
+        return read_memory()
+
+    def render(self, sample):
+        mem, swap = sample
+        return self.format.format(
+            MemUsed=mem.used / self.calc_mem,
+            MemTotal=mem.total / self.calc_mem,
+            MemFree=mem.free / self.calc_mem,
+            MemPercent=mem.percent,
+            Buffers=mem.buffers / self.calc_mem,
+            Active=mem.active / self.calc_mem,
+            Inactive=mem.inactive / self.calc_mem,
+            Shmem=mem.shared / self.calc_mem,
+            SwapTotal=swap.total / self.calc_swap,
+            SwapFree=swap.free / self.calc_swap,
+            SwapUsed=swap.used / self.calc_swap,
+            SwapPercent=swap.percent,
+            mm=self.measure_mem,
+            ms=self.measure_swap,
+        )
+
+
+class DF(_SharedPoll, widget.DF):
+    def sample_key(self):
+        return df_key(self.partition)
+
+    def sample(self):
+        return read_df(self.partition)
+
+    def render(self, statvfs):
+        size = statvfs.f_frsize * statvfs.f_blocks // self.calc
+        free = statvfs.f_frsize * statvfs.f_bfree // self.calc
+        self.user_free = statvfs.f_frsize * statvfs.f_bavail // self.calc
+
+        if self.visible_on_warn and self.user_free >= self.warn_space:
+            return ""
+        return self.format.format(
+            p=self.partition,
+            s=size,
+            f=free,
+            uf=self.user_free,
+            m=self.measure,
+            r=(size - self.user_free) / size * 100,
+        )
+
+
+class Battery(_SharedPoll, widget.Battery):
+    """Battery widget that wakes up on power_supply uevents.
+
+    Plugging or unplugging the charger and capacity steps are announced by the
+    kernel, so the battery is read as soon as something happens. On top of
+    that it is polled every `idle_interval` seconds, dropping to
+    `update_interval` only while discharging within `near_margin` percent of
+    `notify_below`, where the warning must not be late.
+    """
+
+    # widget.Battery.__init__() adds self.defaults, so they have to include
+    # its own.
+    defaults = widget.Battery.defaults + [
+        ("idle_interval", 60, "Seconds between polls away from notify_below"),
+        ("near_margin", 5, "Poll every update_interval this close (in %) above notify_below"),
+    ]
+
+    def timer_setup(self):
+        _SharedPoll.timer_setup(self)
+        uevent.monitor.subscribe("power_supply", self._on_uevent)
+
+    def _on_uevent(self, event):
+        self._sampler.refresh(self._sample_key)
+
+    def sample_key(self):
+        return "battery:{}".format(self.battery)
+
+    def sample(self):
+        try:
+            status = self._battery.update_status()
+        except RuntimeError as e:
+            return e
+
+        # Only the widget whose sample() backs the source gets here, so the
+        # low battery warning is sent once rather than once per bar.
+        if self.notify_below:
+            percent = int(status.percent * 100)
+            if percent < self.notify_below:
+                if not self._has_notified:
+                    # sample() runs in the executor; notify from the loop.
+                    # call_soon_threadsafe() takes no keyword arguments.
+                    self.qtile.call_soon_threadsafe(functools.partial(
+                        notify.notify, "Warning", "Battery at {0}%".format(percent),
+                        tag="battery", urgency=notify.CRITICAL, timeout=self.timeout,
+                    ))
+                    self._has_notified = True
+            elif self._has_notified:
+                self._has_notified = False
+        return status
+
+    def next_interval(self, status):
+        if isinstance(status, RuntimeError) or not self.notify_below:
+            return self.idle_interval
+        if status.state != BatteryState.DISCHARGING:
+            return self.idle_interval
+        if status.percent * 100 - self.notify_below <= self.near_margin:
+            return self.update_interval
+        return self.idle_interval
+
+    def render(self, status):
+        self._sampler.request(self._sample_key, self._on_sample, self.next_interval(status))
+        if isinstance(status, RuntimeError):
+            return "Error: {}".format(status)
+        return self.build_string(status)
+
+    def finalize(self):
+        uevent.monitor.unsubscribe("power_supply", self._on_uevent)
+        _SharedPoll.finalize(self)
@@ -0,0 +1,277 @@
+# Autostart supervisor, replacing the startup_once hooks that ran
+# scripts/qtile_autostart and autostart.sh.
+#
+# The two scripts started their daemons one after the other (and the second one
+# was run with a blocking subprocess.call inside the WM), and between them
+# launched ksuperkey four times, picom twice and two different wallpaper
+# setters. Here every service is declared once, with the services it has to
+# wait for and, where it matters, a command that tells when it is ready. On
+# startup all services whose dependencies are ready are started at the same
+# time from the event loop, and each one logs how long it took, e.g.
+#
+#   autostart: dunst ready after 84.2 ms (at +91.0 ms)
+#
+# Long-running daemons are spawned like lazy.spawn() does, so they are not
+# children of qtile. One-shot commands (xrandr, xsetroot, ...) are awaited
+# without blocking anything else.
+
+import asyncio
+import os
+import shutil
+import subprocess
+import time
+
+import psutil
+from libqtile.log_utils import logger
+
+HOME = os.path.expanduser("~")
+QTILE_DIR = os.path.join(HOME, ".config", "qtile")
+
+
+class Service:
+    """A program started once per session.
+
+    cmd: argv list, or a callable returning one (or None to skip the service).
+    after: names of the services that must be ready first.
+    oneshot: the command runs to completion, it is ready once it has exited.
+    ready: argv of a command polled until it succeeds, for daemons that take
+        a while to become usable (e.g. to own a D-Bus name).
+    replace: kill running processes with this name first, so a restarted X
+        session does not end up with two of them.
+    unless_running: skip the service if a process with this name exists.
+    when: callable deciding whether the service applies to this machine.
+    """
+
+    def __init__(self, name, cmd, after=(), oneshot=False, ready=None, replace=None,
+                 unless_running=None, when=None, timeout=10):
+        self.name = name
+        self.cmd = cmd
+        self.after = tuple(after)
+        self.oneshot = oneshot
+        self.ready = ready
+        self.replace = replace
+        self.unless_running = unless_running
+        self.when = when
+        self.timeout = timeout
+
+    def argv(self):
+        return self.cmd() if callable(self.cmd) else list(self.cmd)
+
+    def __repr__(self):
+        return "<Service {}>".format(self.name)
+
+
+def _processes(name):
+    uid = os.getuid()
+    procs = []
+    for proc in psutil.process_iter(["name", "uids"]):
+        try:
+            if proc.info["name"] == name and proc.info["uids"].real == uid:
+                procs.append(proc)
+        except (psutil.Error, TypeError):
+            pass
+    return procs
+
+
+def _kill(name):
+    procs = _processes(name)
+    for proc in procs:
+        try:
+            proc.terminate()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(procs, timeout=3)
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+
+
+class Supervisor:
+    def __init__(self, services):
+        self.services = {}
+        for service in services:
+            if service.name in self.services:
+                raise ValueError("Service {} declared twice".format(service.name))
+            self.services[service.name] = service
+        for service in self.services.values():
+            for dep in service.after:
+                if dep not in self.services:
+                    raise ValueError("{} depends on unknown service {}".format(service.name, dep))
+        self.status = {}
+        self._done = {}
+        self._t0 = None
+
+    def start(self, qtile):
+        """Start every service; returns immediately, the work runs as tasks."""
+        self._t0 = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        self._done = {name: loop.create_future() for name in self.services}
+        tasks = [loop.create_task(self._run(qtile, s)) for s in self.services.values()]
+        return loop.create_task(self._summary(tasks))
+
+    async def _run(self, qtile, service):
+        try:
+            for dep in service.after:
+                await self._done[dep]
+            status = await self._start(qtile, service)
+        except Exception:
+            logger.exception("autostart: %s failed", service.name)
+            status = "failed"
+        self.status[service.name] = status
+        self._done[service.name].set_result(status)
+
+    async def _start(self, qtile, service):
+        loop = asyncio.get_running_loop()
+        begin = time.perf_counter()
+
+        if service.when is not None and not await loop.run_in_executor(None, service.when):
+            return "skipped"
+        if service.unless_running and await loop.run_in_executor(None, _processes, service.unless_running):
+            logger.info("autostart: %s already running", service.name)
+            return "running"
+        argv = service.argv()
+        if not argv:
+            return "skipped"
+        if shutil.which(argv[0]) is None:
+            logger.warning("autostart: %s: %s not found", service.name, argv[0])
+            return "missing"
+        if service.replace:
+            await loop.run_in_executor(None, _kill, service.replace)
+
+        if service.oneshot:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                code = await asyncio.wait_for(proc.wait(), service.timeout)
+            except asyncio.TimeoutError:
+                logger.warning("autostart: %s still running after %ss", service.name, service.timeout)
+                code = None
+            if code:
+                logger.warning("autostart: %s exited with %s", service.name, code)
+        else:
+            qtile.cmd_spawn(argv)
+            if service.ready and not await self._wait_ready(service):
+                logger.warning("autostart: %s not ready after %ss", service.name, service.timeout)
+
+        now = time.perf_counter()
+        logger.info(
+            "autostart: %s ready after %.1f ms (at +%.1f ms)",
+            service.name, (now - begin) * 1000, (now - self._t0) * 1000,
+        )
+        return "started"
+
+    async def _wait_ready(self, service):
+        if shutil.which(service.ready[0]) is None:
+            return True
+        deadline = time.perf_counter() + service.timeout
+        while time.perf_counter() < deadline:
+            proc = await asyncio.create_subprocess_exec(
+                *service.ready,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            if await proc.wait() == 0:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def _summary(self, tasks):
+        await asyncio.gather(*tasks)
+        counts = {}
+        for status in self.status.values():
+            counts[status] = counts.get(status, 0) + 1
+        logger.info(
+            "autostart: done in %.1f ms (%s)",
+            (time.perf_counter() - self._t0) * 1000,
+            ", ".join("{} {}".format(n, status) for status, n in sorted(counts.items())),
+        )
+
+
+def _exists(path):
+    return lambda: os.path.exists(path)
+
+
+def _in_vm():
+    # autostart.sh forced 1920x1080 inside virtual machines only.
+    try:
+        out = subprocess.run(["systemd-detect-virt"], capture_output=True, text=True).stdout
+    except OSError:
+        return False
+    return out.strip() not in ("", "none")
+
+
+def _with_config(cmd, flag, path):
+    return lambda: cmd + [flag, path] if os.path.exists(path) else cmd
+
+
+def _wallpaper():
+    # The last wallpaper picked with dtos' wallpaper tools wins over the
+    # theme's default one.
+    cache = os.path.join(HOME, ".cache", "wall")
+    if os.path.exists(cache):
+        with open(cache) as f:
+            path = f.read().strip()
+        if path:
+            return ["xwallpaper", "--stretch", path]
+    theme = os.path.join(QTILE_DIR, "theme", "wallpaper")
+    if os.path.exists(theme):
+        return ["hsetroot", "-root", "-cover", theme]
+    return None
+
+
+SERVICES = [
+    # Screen setup first: the wallpaper and the compositor need the final size.
+    Service("resolution", ["xrandr", "-s", "1920x1080"], oneshot=True, when=_in_vm),
+    Service(
+        "screenlayout", [os.path.join(HOME, ".screenlayout", "layout.sh")],
+        after=["resolution"], oneshot=True,
+        when=_exists(os.path.join(HOME, ".screenlayout", "layout.sh")),
+    ),
+    Service("wallpaper", _wallpaper, after=["screenlayout"], oneshot=True),
+    Service(
+        "picom", _with_config(["picom"], "--config", os.path.join(QTILE_DIR, "picom.conf")),
+        after=["screenlayout"], replace="picom",
+    ),
+    # Forks the programs started from key bindings, see launcher.py.
+    Service(
+        "launcher", [os.path.join(QTILE_DIR, "scripts", "qtile_launcher")],
+        ready=[os.path.join(QTILE_DIR, "scripts", "qtile_launcher"), "--check"], timeout=5,
+    ),
+    Service("cursor", ["xsetroot", "-cursor_name", "left_ptr"], oneshot=True),
+    # Both scripts started ksuperkey twice, once per Super key.
+    Service("ksuperkey", ["ksuperkey", "-e", "Super_L=Alt_L|F1;Super_R=Alt_L|F1"], replace="ksuperkey"),
+    Service(
+        "xsettingsd", ["xsettingsd", "--config=" + os.path.join(QTILE_DIR, "xsettingsd")],
+        replace="xsettingsd", when=_exists(os.path.join(QTILE_DIR, "xsettingsd")),
+    ),
+    Service(
+        "dunst", _with_config(["dunst"], "-config", os.path.join(HOME, ".config", "dunst", "dunstrc")),
+        replace="dunst",
+        ready=["busctl", "--user", "status", "org.freedesktop.Notifications"],
+    ),
+    Service(
+        "polkit", ["/usr/lib/xfce-polkit/xfce-polkit"], after=["xsettingsd"],
+        unless_running="xfce-polkit", when=_exists("/usr/lib/xfce-polkit/xfce-polkit"),
+    ),
+    Service("lxsession", ["lxsession"], unless_running="lxsession"),
+    Service("power-manager", ["xfce4-power-manager"], after=["xsettingsd", "dunst"]),
+    Service(
+        "polybar", ["bash", os.path.join(QTILE_DIR, "theme", "polybar.sh")],
+        when=_exists(os.path.join(QTILE_DIR, "theme", "polybar.sh")),
+    ),
+    Service("copyq", ["copyq"], after=["dunst"]),
+    Service("mpd", ["mpd"]),
+]
+
+supervisor = Supervisor(SERVICES)
+
+
+def start(qtile):
+    return supervisor.start(qtile)
@@ -0,0 +1,11 @@
+# The config's modules import each other by name, as qtile runs config.py
+# with its directory on sys.path.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# As in config.py, libqtile comes first: importing libqtile.lazy on its own
+# runs into a circular import with libqtile.command.
+import libqtile.command  # noqa: E402,F401
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+import backlight
+
+
+@pytest.fixture
+def device(tmp_path):
+    def make(brightness, max_brightness):
+        path = tmp_path / "acpi_video0"
+        path.mkdir()
+        (path / "brightness").write_text(str(brightness))
+        (path / "max_brightness").write_text(str(max_brightness))
+        return path / "brightness"
+    return make
+
+
+def _press(controller, *deltas):
+    """Press the keys within one burst, flushing after each press."""
+    async def run():
+        for delta in deltas:
+            controller.change(delta)
+            if controller._target is not None:
+                controller._flush()
+        controller.close()
+    asyncio.run(run())
+
+
+def test_coarse_device_steps_down_on_every_press(device, monkeypatch):
+    monkeypatch.setattr(backlight.notify, "notify", lambda *args, **kwargs: None)
+    brightness = device(7, 7)
+    controller = backlight.Backlight(root=str(brightness.parent.parent))
+
+    _press(controller, -5, -5, -5)
+
+    assert brightness.read_text() == "4"
+
+
+def test_coarse_device_steps_up_from_zero(device):
+    brightness = device(0, 7)
+    controller = backlight.Backlight(root=str(brightness.parent.parent))
+
+    _press(controller, 5)
+
+    assert brightness.read_text() == "1"
+
+
+def test_fine_device_steps_by_percent(device):
+    brightness = device(255, 255)
+    controller = backlight.Backlight(root=str(brightness.parent.parent))
+
+    _press(controller, -5, -5)
+
+    assert brightness.read_text() == "229"
+    assert controller.percent() == 90
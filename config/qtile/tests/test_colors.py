@@ -0,0 +1,37 @@
+import copy
+import pickle
+
+import colors
+import mpris
+
+
+def test_palette_survives_copy_and_pickle():
+    palette = colors.DoomOne.alpha(0.5)
+    for clone in (copy.copy(palette), copy.deepcopy(palette), pickle.loads(pickle.dumps(palette))):
+        assert clone == palette
+        assert clone.name == palette.name
+        assert clone.bg == palette.bg
+        assert isinstance(clone[0], colors.Colour)
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def set_source_rgba(self, *rgba):
+        self.calls.append(("rgba", rgba))
+
+    def set_source_rgb(self, colour, ctx=None):
+        self.calls.append(("parsed", colour))
+
+
+def test_strip_gets_the_cached_tuple():
+    target = mpris._Target.__new__(mpris._Target)
+    target.ctx = target.drawer = recorder = Recorder()
+    colour = colors.DoomOne.alpha(0.5).fg
+
+    target.set_source_rgb(colour)
+    target.set_source_rgb("#ff0000")
+
+    assert recorder.calls == [("rgba", colour.rgba), ("parsed", "#ff0000")]
+    assert colors.Colour("#ff000080").rgba == (1.0, 0.0, 0.0, 128 / 255)
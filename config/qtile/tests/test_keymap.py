@@ -0,0 +1,80 @@
+from types import MethodType, SimpleNamespace
+
+from libqtile.config import Key, KeyChord
+from libqtile.core.manager import Qtile
+from libqtile.lazy import lazy
+
+import keymap
+
+
+class FakeQtile:
+    """What Qtile.process_key_event() touches, with a fake core."""
+
+    def __init__(self, keys, layout):
+        self.config = SimpleNamespace(keys=keys)
+        self.core = SimpleNamespace(
+            grab_key=lambda key: (key.key, tuple(sorted(key.modifiers))),
+            ungrab_keys=lambda: None,
+        )
+        self.calls = []
+        self.server = SimpleNamespace(call=self._call)
+        self.keys_map = {}
+        self.chord_stack = []
+        self.current_layout = SimpleNamespace(name=layout)
+        self.current_window = None
+        for name in ("process_key_event", "grab_key", "ungrab_keys", "grab_chord", "ungrab_chord"):
+            setattr(self, name, MethodType(getattr(Qtile, name), self))
+        for key in keys:
+            self.grab_key(key)
+
+    def _call(self, data):
+        selectors, name, args, kwargs, lifted = data
+        self.calls.append(name)
+        return 0, None
+
+
+def test_layout_restricted_bindings_are_merged():
+    keys = keymap.compile([
+        Key(["mod4"], "equal", lazy.layout.grow().when(layout="monadtall"), desc="Grow"),
+        Key(["mod4"], "equal", lazy.layout.increase_ratio().when(layout="tile"), desc="Ratio"),
+    ])
+
+    assert len(keys) == 1
+    assert keymap.info() == dict(conflicts=[], merged=["root: mod4+equal"])
+
+    for layout, command in (("monadtall", "grow"), ("tile", "increase_ratio")):
+        qtile = FakeQtile(keys, layout)
+        assert qtile.process_key_event("equal", ("mod4",)) == (keys[0], True)
+        assert qtile.calls == [command]
+
+
+def test_key_without_a_command_for_the_layout_is_not_swallowed():
+    keys = keymap.compile([
+        Key(["mod4"], "equal", lazy.layout.grow().when(layout="monadtall")),
+        Key(["mod4"], "equal", lazy.layout.increase_ratio().when(layout="tile")),
+    ])
+    qtile = FakeQtile(keys, "max")
+
+    assert qtile.process_key_event("equal", ("mod4",)) == (keys[0], False)
+    assert qtile.calls == []
+
+
+def test_duplicates_in_chords_are_reported_and_dropped():
+    keys = keymap.compile([
+        KeyChord(["mod4"], "p", [
+            Key([], "h", lazy.spawn("a"), desc="first"),
+            Key([], "h", lazy.spawn("b"), desc="second"),
+        ], name="dmscripts"),
+    ])
+
+    assert [k.desc for k in keys[0].submappings if k.key == "h"] == ["second"]
+    assert keymap.info()["conflicts"] == [
+        dict(chord="dmscripts", combo="h", kept="second", dropped="first"),
+    ]
+
+    qtile = FakeQtile(keys, "max")
+    qtile.process_key_event("p", ("mod4",))
+    assert qtile.chord_stack == [keys[0]]
+    qtile.process_key_event("h", ())
+    assert qtile.calls == ["spawn"]
+    assert qtile.chord_stack == []
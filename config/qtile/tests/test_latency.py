@@ -0,0 +1,67 @@
+from types import MethodType, SimpleNamespace
+
+from libqtile.config import Key
+from libqtile.core.manager import Qtile
+from libqtile.lazy import lazy
+
+import latency
+
+
+class FakeQtile:
+    """What Qtile.process_key_event() touches, with a fake core."""
+
+    def __init__(self, keys, layout):
+        self.core = SimpleNamespace(grab_key=lambda key: (key.key, tuple(key.modifiers)))
+        self.calls = []
+        self.server = SimpleNamespace(call=self._call)
+        self.keys_map = {}
+        self.chord_stack = []
+        self.current_layout = SimpleNamespace(name=layout)
+        self.current_window = None
+        for name in ("process_key_event", "grab_key"):
+            setattr(self, name, MethodType(getattr(Qtile, name), self))
+        for key in keys:
+            self.grab_key(key)
+
+    def _call(self, data):
+        selectors, name, args, kwargs, lifted = data
+        self.calls.append(name)
+        return 0, None
+
+
+def test_keys_are_timed_around_qtile_dispatch():
+    latency.stats.reset()
+    keys = latency.keys([
+        Key(["mod4"], "Return", lazy.spawn("alacritty")),
+        Key(["mod4"], "equal", lazy.layout.grow().when(layout="monadtall")),
+    ])
+    qtile = FakeQtile(keys, "max")
+    latency.install(qtile)
+    latency.install(qtile)
+
+    assert qtile.process_key_event("Return", ("mod4",)) == (keys[0], True)
+    # Not for this layout: passed on to the window, as without the timing.
+    assert qtile.process_key_event("equal", ("mod4",)) == (keys[1], False)
+    assert qtile.process_key_event("x", ()) == (None, False)
+
+    assert qtile.calls == ["spawn"]
+    summary = latency.stats.summary()
+    assert sorted(summary) == ["key mod4+Return", "key mod4+equal"]
+    # Installed twice, still timed once.
+    assert summary["key mod4+Return"]["count"] == 1
+
+
+def test_lazy_click_runs_like_button_press():
+    latency.stats.reset()
+    qtile = FakeQtile([], "max")
+    w = SimpleNamespace(
+        name="memory", qtile=qtile,
+        mouse_callbacks={"Button1": lazy.spawn("htop"), "Button3": lazy.spawn("x").when(layout="tile")},
+    )
+    latency.mouse_callbacks([w])
+
+    w.mouse_callbacks["Button1"]()
+    w.mouse_callbacks["Button3"]()
+
+    assert qtile.calls == ["spawn"]
+    assert sorted(latency.stats.summary()) == ["click memory Button1", "click memory Button3"]
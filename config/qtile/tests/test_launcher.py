@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import launcher
+
+LAUNCHER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "qtile_launcher")
+
+
+async def _serve(path, reply):
+    """A launcher answering each request with reply(argv), or not at all
+    when that is None."""
+    async def handle(reader, writer):
+        while line := await reader.readline():
+            answer = reply(json.loads(line)["argv"])
+            if answer is not None:
+                writer.write(json.dumps(answer).encode() + b"\n")
+    return await asyncio.start_unix_server(handle, path)
+
+
+def test_spawns_through_launcher_once_connected(tmp_path):
+    received, fallbacks = [], []
+
+    async def run():
+        server = await _serve(str(tmp_path / "sock"), lambda argv: received.append(argv) or {"pid": 1})
+        client = launcher.Client(str(tmp_path / "sock"))
+        # Not connected yet: qtile spawns, the connection is made meanwhile.
+        client.spawn(["first"], lambda: fallbacks.append("first"))
+        await asyncio.sleep(0.1)
+        client.spawn(["second"], lambda: fallbacks.append("second"))
+        await asyncio.sleep(0.1)
+        client.close()
+        server.close()
+
+    asyncio.run(run())
+
+    assert fallbacks == ["first"]
+    assert received == [["second"]]
+
+
+def test_slow_launcher_does_not_start_the_command_twice(tmp_path):
+    received, fallbacks = [], []
+
+    async def run():
+        server = await _serve(str(tmp_path / "sock"), lambda argv: received.append(argv) and None)
+        client = launcher.Client(str(tmp_path / "sock"), timeout=0.2)
+        client.spawn(["connect"], lambda: None)
+        await asyncio.sleep(0.1)
+
+        start = time.perf_counter()
+        client.spawn(["slow"], lambda: fallbacks.append("slow"))
+        assert time.perf_counter() - start < 0.05
+
+        await asyncio.sleep(0.3)
+        # Sent, so possibly started: given up on, but not spawned again.
+        assert fallbacks == []
+        assert received == [["slow"]]
+        # The next press goes through qtile while reconnecting.
+        client.spawn(["next"], lambda: fallbacks.append("next"))
+        client.close()
+        server.close()
+
+    asyncio.run(run())
+
+    assert fallbacks == ["next"]
+
+
+def test_command_gets_qtile_environment_and_directory(tmp_path, monkeypatch):
+    sock = str(tmp_path / "sock")
+    out = tmp_path / "out"
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    proc = subprocess.Popen([sys.executable, LAUNCHER, "--socket", sock])
+    try:
+        monkeypatch.setenv("LAUNCHER_TEST", "from qtile")
+        monkeypatch.chdir(workdir)
+        fallbacks = []
+
+        async def run():
+            client = launcher.Client(sock, timeout=2)
+            for _ in range(100):
+                client.spawn(
+                    ["sh", "-c", 'pwd > "$0"; echo "$LAUNCHER_TEST" >> "$0"', str(out)],
+                    lambda: fallbacks.append(None),
+                )
+                if len(fallbacks) == 0:
+                    break
+                fallbacks.clear()
+                await asyncio.sleep(0.05)
+            for _ in range(100):
+                if out.exists() and out.read_text().count("\n") == 2:
+                    break
+                await asyncio.sleep(0.05)
+            client.close()
+
+        asyncio.run(run())
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    assert out.read_text() == "{}\nfrom qtile\n".format(workdir)
@@ -0,0 +1,54 @@
+import asyncio
+
+import polltext
+
+
+def _widget(func, update_interval):
+    w = polltext.PollText.__new__(polltext.PollText)
+    w.func = func
+    w.update_interval = update_interval
+    w.timeout = 5
+    w.name = "polltext"
+    w._running = None
+    w._task = None
+    w.shown = []
+    w.update = w.shown.append
+    w.timeout_add = lambda seconds, method: w.scheduled.append(seconds)
+    w.scheduled = []
+    return w
+
+
+def test_without_update_interval_polls_once():
+    calls = []
+
+    def func():
+        calls.append(None)
+        return "text"
+
+    w = _widget(func, None)
+
+    async def run():
+        w.timer_setup()
+        await w._task
+        # Give a (wrongly) rescheduled poll the chance to run.
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    assert calls == [None]
+    assert w.shown == ["text"]
+    assert w.scheduled == []
+
+
+def test_update_interval_schedules_next_poll():
+    w = _widget(lambda: "text", 30)
+
+    async def run():
+        w.timer_setup()
+        await w._task
+
+    asyncio.run(run())
+
+    assert w.shown == ["text"]
+    assert w.scheduled == [30]
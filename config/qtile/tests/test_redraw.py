@@ -0,0 +1,54 @@
+import types
+
+import redraw
+
+
+class FakeQtile:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, func):
+        self.timers.append(func)
+        return types.SimpleNamespace(cancel=lambda: None)
+
+
+def _bar(qtile):
+    b = redraw.Bar.__new__(redraw.Bar)
+    b.qtile = qtile
+    b.max_fps = 30
+    b.widgets = []
+    b._dirty = {}
+    b._full = False
+    b._frame = None
+    b._last_frame = 0.0
+    b._in_frame = False
+    b._reset_stats()
+    return b
+
+
+class Widget:
+    def __init__(self):
+        self.drawn = 0
+
+    def draw(self):
+        self.drawn += 1
+
+
+def test_widget_moving_between_bars_is_wrapped_once():
+    qtile = FakeQtile()
+    first, second = _bar(qtile), _bar(qtile)
+    w = Widget()
+    first._hook(w)
+    first._hook(w)
+    # e.g. the systray moving to another monitor's bar.
+    second._hook(w)
+    second.widgets.append(w)
+
+    w.draw()
+    w.draw()
+    assert (first.draws_requested, second.draws_requested) == (0, 2)
+    assert list(second._dirty) == [w]
+
+    qtile.timers.pop()()
+    assert w.drawn == 1
+    assert second.draws_performed == 1
@@ -0,0 +1,117 @@
+import concurrent.futures
+import types
+
+from libqtile.widget.battery import BatteryState
+
+import notify
+import sampler
+
+
+class FakeQtile:
+    """Runs call_soon_threadsafe() callbacks at once; like qtile's, it only
+    passes positional arguments on."""
+
+    def call_soon_threadsafe(self, func, *args):
+        func(*args)
+
+
+class FakeBattery:
+    def __init__(self, percent):
+        self.percent = percent
+
+    def update_status(self):
+        return types.SimpleNamespace(percent=self.percent, state=BatteryState.DISCHARGING)
+
+
+def _battery(percent):
+    w = sampler.Battery.__new__(sampler.Battery)
+    w.qtile = FakeQtile()
+    w._battery = FakeBattery(percent)
+    w.notify_below = 10
+    w.timeout = 10
+    w._has_notified = False
+    return w
+
+
+def test_low_battery_warning_is_sent_once(monkeypatch):
+    sent = []
+    monkeypatch.setattr(notify, "notify", lambda *args, **kwargs: sent.append((args, kwargs)))
+    w = _battery(0.05)
+
+    w.sample()
+    w.sample()
+
+    assert sent == [
+        (("Warning", "Battery at 5%"), dict(tag="battery", urgency=notify.CRITICAL, timeout=10)),
+    ]
+
+
+def test_low_battery_warning_is_sent_again_after_charging(monkeypatch):
+    sent = []
+    monkeypatch.setattr(notify, "notify", lambda *args, **kwargs: sent.append(args))
+    w = _battery(0.05)
+
+    w.sample()
+    w._battery.percent = 0.5
+    w.sample()
+    w._battery.percent = 0.08
+    w.sample()
+
+    assert [body for _, body in sent] == ["Battery at 5%", "Battery at 8%"]
+
+
+class LoopQtile:
+    """Runs executor jobs inline and keeps call_later() timers for the test."""
+
+    def __init__(self):
+        self.timers = []
+
+    def run_in_executor(self, func):
+        future = concurrent.futures.Future()
+        future.set_result(func())
+        return future
+
+    def call_later(self, delay, func, *args):
+        timer = types.SimpleNamespace(cancel=lambda: None, run=lambda: func(*args))
+        self.timers.append(timer)
+        return timer
+
+
+def test_source_moves_to_the_next_subscriber():
+    qtile = LoopQtile()
+    s = sampler.Sampler()
+    reads, seen = [], []
+    first = lambda value: seen.append(("first", value))  # noqa: E731
+    second = lambda value: seen.append(("second", value))  # noqa: E731
+
+    s.subscribe(qtile, "key", lambda: reads.append("first") or 1, 1, first)
+    s.subscribe(qtile, "key", lambda: reads.append("second") or 2, 1, second)
+    s.unsubscribe("key", first)
+    qtile.timers[-1].run()
+
+    assert reads == ["first", "second"]
+    assert seen[-1] == ("second", 2)
+
+
+def test_battery_interval_does_not_override_faster_subscribers():
+    qtile = LoopQtile()
+    s = sampler.Sampler()
+    w = _battery(0.8)
+    w.idle_interval, w.update_interval, w.near_margin = 60, 5, 5
+    w.build_string = lambda status: "80%"
+    w.update = lambda text: None
+    w._sampler = s
+    w._sample_key = "battery"
+    popup = lambda value: None  # noqa: E731
+
+    s.subscribe(qtile, "battery", w.sample, w.update_interval, w._on_sample)
+    # Far from notify_below: the widget asks for idle_interval.
+    assert s._sources["battery"].interval == 60
+    # The procmon popup wants it every second, and the widget's next render
+    # must not undo that.
+    s.subscribe(qtile, "battery", w.sample, 1, popup)
+    qtile.timers[-1].run()
+    assert s._sources["battery"].interval == 1
+
+    s.unsubscribe("battery", popup)
+    assert s._sources["battery"].interval == 60
@@ -0,0 +1,111 @@
+import asyncio
+import types
+
+import notify
+import volume
+
+
+class FakePulse:
+    def __init__(self, level, sink_muted=False, source_muted=False):
+        self.sink = types.SimpleNamespace(
+            volume=types.SimpleNamespace(value_flat=level), mute=int(sink_muted)
+        )
+        self.source = types.SimpleNamespace(mute=int(source_muted))
+        self.info = types.SimpleNamespace(default_sink_name="sink", default_source_name="source")
+
+    async def server_info(self):
+        return self.info
+
+    async def get_sink_by_name(self, name):
+        # pulsectl returns a fresh snapshot on every call.
+        return types.SimpleNamespace(kind="sink", volume=self.sink.volume, mute=self.sink.mute)
+
+    async def get_source_by_name(self, name):
+        return types.SimpleNamespace(kind="source", mute=self.source.mute)
+
+    async def mute(self, obj, mute):
+        getattr(self, obj.kind).mute = int(mute)
+
+    async def volume_set_all_chans(self, sink, value):
+        self.sink.volume = types.SimpleNamespace(value_flat=value)
+
+
+def _apply(controller, pulse):
+    controller._pulse = pulse
+    asyncio.run(controller._apply())
+
+
+def test_burst_applies_every_pending_change(monkeypatch):
+    sent = []
+    monkeypatch.setattr(notify, "notify", lambda summary, body, **kwargs: sent.append(body))
+    controller = volume.VolumeController()
+    pulse = FakePulse(0.5)
+    controller._pending_mic = True
+    controller._pending_delta = 10
+    controller._pending_mute = True
+
+    _apply(controller, pulse)
+
+    assert pulse.source.mute == 1
+    assert round(pulse.sink.volume.value_flat * 100) == 60
+    assert pulse.sink.mute == 1
+    assert sent == ["Microphone Switched OFF\nVolume : 60%\nMute"]
+
+
+def test_volume_step_unmutes(monkeypatch):
+    monkeypatch.setattr(notify, "notify", lambda *args, **kwargs: None)
+    controller = volume.VolumeController()
+    pulse = FakePulse(0.5, sink_muted=True)
+    controller._pending_delta = -5
+
+    _apply(controller, pulse)
+
+    assert round(pulse.sink.volume.value_flat * 100) == 45
+    assert pulse.sink.mute == 0
+
+
+def test_reconnects_after_the_server_goes_away(monkeypatch):
+    class Disconnected(Exception):
+        pass
+
+    # Not a PulseError, as in pulsectl.
+    monkeypatch.setattr(volume, "PulseDisconnected", Disconnected)
+    monkeypatch.setattr(volume, "PulseError", type("PulseError", (Exception,), {}))
+    monkeypatch.setattr(volume, "RETRY_MIN", 0)
+    connections = []
+
+    async def events(*kinds):
+        if len(connections) == 1:
+            raise Disconnected()
+        await asyncio.Event().wait()
+        yield
+
+    class FakePulseAsync:
+        def __init__(self, name):
+            pass
+
+        async def __aenter__(self):
+            pulse = FakePulse(0.5 + len(connections) / 10)
+            pulse.subscribe_events = events
+            connections.append(pulse)
+            return pulse
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    monkeypatch.setattr(volume, "PulseAsync", FakePulseAsync)
+    controller = volume.VolumeController()
+    seen = []
+
+    async def run():
+        controller.subscribe(lambda: seen.append(controller.volume))
+        for _ in range(100):
+            if len(seen) == 2:
+                break
+            await asyncio.sleep(0.01)
+        controller.close()
+
+    asyncio.run(run())
+
+    assert len(connections) == 2
+    assert seen == [50, 60]
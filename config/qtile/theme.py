@@ -0,0 +1,174 @@
+# Switching colorschemes at runtime.
+#
+# dtos-colorscheme used to sed-edit `colors = colors.X` in config.py and restart
+# qtile, which tears down every bar, widget and layout. Here the new scheme is
+# swapped into the running objects instead: config.py hands every widget,
+# decoration, bar and layout the very same slot objects of the palette
+# (colors[0], colors[8], ...), so any attribute that *is* a slot of the old
+# palette is replaced by the same slot of the new one, and everything is
+# repainted once.
+#
+# From a key binding:
+#
+#   Key([mod], "F12", lazy.function(theme.set_scheme, "Nord")),
+#
+# or from outside through qtile's eval command, which is what dtos-colorscheme
+# does:
+#
+#   qtile cmd-obj -o cmd -f eval -a "__import__('theme').set_scheme(self, 'Nord')"
+#   qtile cmd-obj -o cmd -f eval -a "__import__('theme').info()"
+#
+# The last choice is saved in ~/.cache/qtile/colorscheme and picked up again by
+# load() after a restart; the scheme named in config.py is only the default.
+
+import os
+import time
+
+from libqtile.log_utils import logger
+
+import colors
+import lazylayouts
+
+STATE = os.path.join(os.path.expanduser("~"), ".cache", "qtile", "colorscheme")
+
+
+def schemes():
+    """Names of the palettes defined in colors.py."""
+    return sorted(
+        name for name, value in vars(colors).items()
+        if isinstance(value, colors.Palette)
+    )
+
+
+class Theme:
+    def __init__(self):
+        self.name = None
+        self.palette = None
+        self._tracked = []
+        self._subscribers = []
+
+    def load(self, default):
+        """Palette for this config load: the saved choice, or `default`."""
+        name = default
+        try:
+            with open(STATE) as f:
+                saved = f.read().strip()
+        except OSError:
+            saved = None
+        if saved in schemes():
+            name = saved
+        self.name = name
+        self.palette = getattr(colors, name)
+        return self.palette
+
+    def track(self, *objs):
+        """Also recolour these: dicts like layout_theme and widget_defaults that
+        later objects are created from, or widgets not (yet) shown in a bar."""
+        self._tracked.extend(objs)
+
+    def subscribe(self, callback):
+        """Call `callback(palette)` after every switch."""
+        self._subscribers.append(callback)
+        return callback
+
+    def apply(self, qtile, name):
+        if name not in schemes():
+            raise ValueError("Unknown colorscheme: {}".format(name))
+        start = time.perf_counter()
+        old, new = self.palette, getattr(colors, name)
+        swap = {id(o): n for o, n in zip(old, new)}
+
+        changed = 0
+        for obj in _objects(qtile, self._tracked):
+            changed += _swap_attributes(obj, swap)
+
+        self.name, self.palette = name, new
+        for callback in list(self._subscribers):
+            callback(new)
+
+        for screen in qtile.screens:
+            for gap in (screen.top, screen.bottom, screen.left, screen.right):
+                if gap is not None and hasattr(gap, "widgets"):
+                    gap.draw()
+        for group in qtile.groups:
+            if group.screen:
+                group.layout_all()
+
+        _save(name)
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info("Switched to colorscheme %s in %.1f ms (%d attributes)", name, elapsed, changed)
+        return dict(scheme=name, attributes=changed, ms=round(elapsed, 2))
+
+    def info(self):
+        return dict(current=self.name, available=schemes())
+
+
+def _objects(qtile, tracked):
+    seen = set()
+    objs = list(tracked)
+    for screen in qtile.screens:
+        for gap in (screen.top, screen.bottom, screen.left, screen.right):
+            if gap is not None:
+                objs.append(gap)
+                objs.extend(getattr(gap, "widgets", []))
+    layouts = list(qtile.config.layouts) + [qtile.config.floating_layout]
+    for group in qtile.groups:
+        layouts.extend(group.layouts)
+        layouts.append(group.floating_layout)
+    for layout in layouts:
+        if isinstance(layout, lazylayouts.LazyLayout):
+            objs.append(layout.config)
+            layout = layout.built_layout
+        if layout is not None:
+            objs.append(layout)
+
+    for obj in objs:
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        yield obj
+        # qtile-extras widget decorations
+        for decoration in getattr(obj, "decorations", None) or []:
+            yield decoration
+
+
+def _swap_attributes(obj, swap):
+    if isinstance(obj, dict):
+        items = [(key, value) for key, value in obj.items() if id(value) in swap]
+        for key, value in items:
+            obj[key] = swap[id(value)]
+        return len(items)
+
+    changed = 0
+    cls = type(obj)
+    for attr, value in list(vars(obj).items()):
+        if id(value) not in swap:
+            continue
+        # Go through properties like _TextBox.foreground, which also recolour
+        # the already configured text layout.
+        if attr.startswith("_") and isinstance(getattr(cls, attr[1:], None), property):
+            attr = attr[1:]
+        setattr(obj, attr, swap[id(value)])
+        changed += 1
+    return changed
+
+
+def _save(name):
+    try:
+        os.makedirs(os.path.dirname(STATE), exist_ok=True)
+        with open(STATE, "w") as f:
+            f.write(name + "\n")
+    except OSError:
+        logger.warning("Cannot save colorscheme choice to %s", STATE)
+
+
+theme = Theme()
+load = theme.load
+track = theme.track
+subscribe = theme.subscribe
+info = theme.info
+
+
+def set_scheme(qtile, name):
+    """For lazy.function(theme.set_scheme, "Nord") and qtile's eval command."""
+    return theme.apply(qtile, name)
@@ -0,0 +1,95 @@
+# Kernel uevent listener shared by the widgets that would otherwise poll /sys.
+#
+# The kernel broadcasts a uevent on a netlink socket whenever a device changes
+# (a power supply is plugged in, a battery's capacity drops a step, firmware
+# changes the backlight, ...). One socket is opened for the whole config and
+# hooked into the event loop; callbacks subscribe per subsystem and receive the
+# event as a dict of its KEY=VALUE properties.
+
+import asyncio
+import socket
+from collections import defaultdict
+
+from libqtile.log_utils import logger
+
+NETLINK_KOBJECT_UEVENT = 15
+KERNEL_GROUP = 1
+
+
+def parse_uevent(data):
+    """Parse a raw kernel uevent ("action@devpath\\0KEY=VALUE\\0...") into a dict."""
+    fields = data.rstrip(b"\0").split(b"\0")
+    event = {}
+    for field in fields[1:]:
+        key, sep, value = field.decode("utf-8", "replace").partition("=")
+        if sep:
+            event[key] = value
+    return event
+
+
+class UEventMonitor:
+    def __init__(self):
+        self._sock = None
+        self._handlers = defaultdict(list)
+
+    @property
+    def available(self):
+        """Whether events can be received; callers should poll if not."""
+        return self._start()
+
+    def subscribe(self, subsystem, callback):
+        self._handlers[subsystem].append(callback)
+        return self._start()
+
+    def unsubscribe(self, subsystem, callback):
+        handlers = self._handlers.get(subsystem, [])
+        if callback in handlers:
+            handlers.remove(callback)
+        if self._sock is not None and not any(self._handlers.values()):
+            self.close()
+
+    def close(self):
+        if self._sock is not None:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+
+    def _start(self):
+        if self._sock is not None:
+            return True
+        try:
+            sock = socket.socket(
+                socket.AF_NETLINK,
+                socket.SOCK_DGRAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+                NETLINK_KOBJECT_UEVENT,
+            )
+            sock.bind((0, KERNEL_GROUP))
+        except (AttributeError, OSError):
+            logger.warning("Cannot listen for kernel uevents, falling back to polling")
+            return False
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._read)
+        self._sock = sock
+        return True
+
+    def _read(self):
+        while True:
+            try:
+                data = self._sock.recv(16384)
+            except BlockingIOError:
+                return
+            except OSError:
+                # ENOBUFS: events were dropped, there is nothing to recover.
+                logger.debug("uevent socket overrun")
+                return
+            event = parse_uevent(data)
+            for callback in list(self._handlers.get(event.get("SUBSYSTEM"), [])):
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("uevent callback failed")
+
+
+# See volume.py: lazy.reload_config() re-runs modules in their old namespace.
+if "monitor" in globals():
+    monitor.close()  # noqa: F821
+monitor = UEventMonitor()
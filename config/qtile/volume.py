@@ -0,0 +1,235 @@
+# In-process volume control for the XF86Audio keys and the Volume widget.
+#
+# The keys used to spawn scripts/qtile_volume, which runs pulsemixer three or
+# four times and then dunstify; holding a key forked dozens of processes a
+# second. The stock Volume widget is no better: it runs amixer on every bar
+# every 0.2s. Here a single PulseAudio/PipeWire connection is kept open for the
+# lifetime of the config. Key presses only add to a pending change; whatever
+# piles up while a change is in flight is applied as one more change, followed
+# by a single notification. The widgets are redrawn from the server's own
+# change events instead of polling.
+
+import asyncio
+
+from libqtile.command.base import expose_command
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+# Make sure 'pulsectl-asyncio' is installed, it is also what qtile's own
+# PulseVolume widget uses.
+from pulsectl import PulseDisconnected, PulseError
+from pulsectl_asyncio import PulseAsync
+from qtile_extras import widget
+
+import notify
+
+# Seconds between attempts to reach the server, doubling up to the maximum.
+RETRY_MIN = 1
+RETRY_MAX = 30
+
+
+class VolumeController:
+    """Owns the pulse connection, the pending key presses and the listeners."""
+
+    def __init__(self, step=5, max_volume=100):
+        self.step = step
+        self.max_volume = max_volume
+        self.volume = None
+        self.muted = False
+        self._pulse = None
+        self._task = None
+        self._subscribers = []
+        self._pending_delta = 0
+        self._pending_mute = False
+        self._pending_mic = False
+        self._applying = False
+        self._refresh_queued = False
+
+    def subscribe(self, callback):
+        self._start()
+        self._subscribers.append(callback)
+        if self.volume is not None:
+            callback()
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def change(self, delta):
+        self._pending_delta += delta
+        self._kick()
+
+    def toggle_mute(self):
+        self._pending_mute = not self._pending_mute
+        self._kick()
+
+    def toggle_mic(self):
+        self._pending_mic = not self._pending_mic
+        self._kick()
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        delay = RETRY_MIN
+        while True:
+            try:
+                async with PulseAsync("qtile-volume") as pulse:
+                    self._pulse = pulse
+                    delay = RETRY_MIN
+                    await self._refresh()
+                    if not self._applying:
+                        asyncio.create_task(self._apply())  # presses made while offline
+                    async for _event in pulse.subscribe_events("sink", "server"):
+                        self._queue_refresh()
+            # PulseDisconnected, raised when the server goes away (e.g. it is
+            # restarted), is not a PulseError.
+            except (PulseError, PulseDisconnected, OSError):
+                logger.warning("Lost connection to pulseaudio, retrying in %ds", delay)
+            finally:
+                self._pulse = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX)
+
+    def _kick(self):
+        self._start()
+        if not self._applying:
+            asyncio.create_task(self._apply())
+
+    async def _apply(self):
+        # Only one change is in flight at a time. Presses arriving meanwhile
+        # accumulate in the _pending_* fields and go out together next round.
+        self._applying = True
+        messages = {}
+        try:
+            while self._pulse is not None and (
+                self._pending_delta or self._pending_mute or self._pending_mic
+            ):
+                delta, self._pending_delta = self._pending_delta, 0
+                mute, self._pending_mute = self._pending_mute, False
+                mic, self._pending_mic = self._pending_mic, False
+                messages.update(await self._change(delta, mute, mic))
+                await self._refresh()
+                if not (self._pending_delta or self._pending_mute or self._pending_mic):
+                    self._notify(messages)
+                    messages = {}
+        except (PulseError, PulseDisconnected):
+            logger.exception("Failed to change volume")
+        finally:
+            self._applying = False
+
+    async def _change(self, delta, mute, mic):
+        """Apply all of a round's changes; returns their messages by kind."""
+        info = await self._pulse.server_info()
+        messages = {}
+        if mic:
+            source = await self._pulse.get_source_by_name(info.default_source_name)
+            await self._pulse.mute(source, not source.mute)
+            messages["mic"] = "Microphone Switched ON" if source.mute else "Microphone Switched OFF"
+        if not (delta or mute):
+            return messages
+
+        sink = await self._pulse.get_sink_by_name(info.default_sink_name)
+        muted = bool(sink.mute)
+        if delta:
+            level = round(sink.volume.value_flat * 100) + delta
+            level = max(0, min(self.max_volume, level))
+            if muted:
+                await self._pulse.mute(sink, False)
+                muted = False
+            await self._pulse.volume_set_all_chans(sink, level / 100)
+            messages["volume"] = "Volume : {}%".format(level)
+        if mute:
+            await self._pulse.mute(sink, not muted)
+            messages["mute"] = "Unmute" if muted else "Mute"
+        return messages
+
+    def _queue_refresh(self):
+        # A single change can produce a burst of events, one refresh covers them.
+        if not self._refresh_queued:
+            self._refresh_queued = True
+            asyncio.create_task(self._refresh())
+
+    async def _refresh(self):
+        self._refresh_queued = False
+        if self._pulse is None:
+            return
+        info = await self._pulse.server_info()
+        sink = await self._pulse.get_sink_by_name(info.default_sink_name)
+        volume, muted = round(sink.volume.value_flat * 100), bool(sink.mute)
+        if (volume, muted) == (self.volume, self.muted):
+            return
+        self.volume, self.muted = volume, muted
+        for callback in list(self._subscribers):
+            callback()
+
+    def _notify(self, messages):
+        # One notification for the whole burst, e.g. "Microphone Switched OFF"
+        # and "Volume : 40%" when both keys were pressed.
+        text = "\n".join(messages[kind] for kind in ("mic", "volume", "mute") if kind in messages)
+        if text:
+            notify.notify("Volume", text, tag="volume", timeout=2000)
+
+
+# importlib.reload() (used by lazy.reload_config) re-runs this module in its old
+# namespace; close the previous connection instead of leaking it.
+if "controller" in globals():
+    controller.close()  # noqa: F821
+controller = VolumeController()
+
+
+@lazy.function
+def volume_up(qtile):
+    controller.change(controller.step)
+
+
+@lazy.function
+def volume_down(qtile):
+    controller.change(-controller.step)
+
+
+@lazy.function
+def toggle_mute(qtile):
+    controller.toggle_mute()
+
+
+@lazy.function
+def toggle_mic(qtile):
+    controller.toggle_mic()
+
+
+class Volume(widget.Volume):
+    """Volume widget fed by the shared controller instead of polling amixer."""
+
+    def timer_setup(self):
+        if self.theme_path:
+            self.setup_images()
+        controller.subscribe(self._on_change)
+
+    def _on_change(self):
+        self.volume = -1 if controller.muted else controller.volume
+        self._update_drawer()
+        self.bar.draw()
+
+    # Also what the widget's own scroll and click callbacks call.
+
+    @expose_command()
+    def increase_vol(self):
+        controller.change(self.step)
+
+    @expose_command()
+    def decrease_vol(self):
+        controller.change(-self.step)
+
+    @expose_command()
+    def mute(self):
+        controller.toggle_mute()
+
+    def finalize(self):
+        controller.unsubscribe(self._on_change)
+        widget.Volume.finalize(self)
@@ -0,0 +1,133 @@
+# WindowName that keeps up with title-spamming clients without redrawing for each change.
+#
+# Browsers showing a progress bar in the title and terminals printing build
+# output in theirs change _NET_WM_NAME many times a second. widget.WindowName
+# answers every client_name_updated with a redraw, on every bar, for any window
+# (even one on another screen), and since the text is truncated to max_chars
+# only after the comparison, a long title redraws even when its first 40
+# characters did not change.
+#
+# This WindowName:
+#
+#   - ignores title changes of windows it is not showing;
+#   - repaints a window's title at most once per `min_interval` seconds; the
+#     changes in between are coalesced into one repaint at the end of the
+#     interval, so the final title is always shown;
+#   - compares the truncated text, so a change past max_chars costs nothing.
+#
+# Focus and float changes still update immediately. The counters are available
+# over the command interface, e.g.
+#
+#   qtile cmd-obj -o widget windowname -f title_stats
+#   qtile cmd-obj -o widget windowname -f reset_title_stats
+
+import time
+import weakref
+
+from libqtile import hook
+from qtile_extras import widget
+
+
+class WindowName(widget.WindowName):
+    defaults = [
+        ("min_interval", 0.5, "Minimum seconds between repaints for title changes of one window."),
+    ]
+
+    def __init__(self, **config):
+        widget.WindowName.__init__(self, **config)
+        self.add_defaults(WindowName.defaults)
+        self._last_repaint = weakref.WeakKeyDictionary()
+        self._pending = None
+        self._title_repaint = False
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.titles_received = 0
+        self.titles_other_window = 0
+        self.titles_coalesced = 0
+        self.titles_shown = 0
+        self.repaints_unchanged = 0
+        self.repaints = 0
+
+    def _repaint_title(self):
+        self._title_repaint = True
+        try:
+            self.hook_response()
+        finally:
+            self._title_repaint = False
+
+    def _configure(self, qtile, bar):
+        widget.WindowName._configure(self, qtile, bar)
+        # Title changes go through the rate limit instead.
+        hook.unsubscribe.client_name_updated(self.hook_response)
+        hook.subscribe.client_name_updated(self._title_changed)
+
+    def remove_hooks(self):
+        hook.unsubscribe.client_name_updated(self._title_changed)
+        hook.unsubscribe.focus_change(self.hook_response)
+        hook.unsubscribe.float_change(self.hook_response)
+        hook.unsubscribe.current_screen_change(self.hook_response_current_screen)
+
+    def _shown(self):
+        if self.for_current_screen:
+            return self.qtile.current_screen.group.current_window
+        return self.bar.screen.group.current_window
+
+    def _title_changed(self, win):
+        self.titles_received += 1
+        if win is not self._shown():
+            self.titles_other_window += 1
+            return
+        now = time.monotonic()
+        due = self._last_repaint.get(win, 0) + self.min_interval
+        if now < due:
+            self.titles_coalesced += 1
+            if self._pending is None:
+                self._pending = self.timeout_add(due - now, self._flush)
+            return
+        self._last_repaint[win] = now
+        self._repaint_title()
+
+    def _flush(self):
+        # Shows whatever the title is by now, if that window is still shown.
+        self._pending = None
+        win = self._shown()
+        if win is not None:
+            self._last_repaint[win] = time.monotonic()
+        self._repaint_title()
+
+    def update(self, text):
+        text = text or ""
+        if len(text) > self.max_chars > 0:
+            shown = text[: self.max_chars] + "…"
+        else:
+            shown = text
+        if shown == self.text:
+            self.repaints_unchanged += 1
+            return
+        self.repaints += 1
+        if self._title_repaint:
+            self.titles_shown += 1
+        widget.WindowName.update(self, text)
+
+    def cmd_title_stats(self):
+        """Title changes received vs. shown; `repaints` also counts focus changes."""
+        return dict(
+            received=self.titles_received,
+            shown=self.titles_shown,
+            dropped=self.titles_received - self.titles_shown,
+            other_window=self.titles_other_window,
+            coalesced=self.titles_coalesced,
+            unchanged=self.repaints_unchanged,
+            repaints=self.repaints,
+            min_interval=self.min_interval,
+        )
+
+    def cmd_reset_title_stats(self):
+        self._reset_stats()
+
+    def finalize(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        widget.WindowName.finalize(self)